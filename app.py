@@ -1,17 +1,82 @@
 import streamlit as st
 from dataclasses import dataclass
-from typing import List, Optional, Iterator
+from typing import AsyncIterator, List, Optional, Iterator
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.vectorstores import FAISS
-from langchain_core.runnables import RunnablePassthrough
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from langchain_openai.embeddings import OpenAIEmbeddings
-from multi_doc_loader import MultiFileLoader
-from reset_docs import DirectoryManager
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from ingestion_jobs import IngestionJobQueue, DONE, FAILED
+from collection_registry import CollectionRegistry, LoadedCollection, DEFAULT_COLLECTION
+from query_cache import QueryCache, SemanticAnswerCache
+from context_builder import ContextBuilder
+from lexical_index import KEYWORD_MIN_SCORE_RATIO, is_keyword_query, reciprocal_rank_fusion
+from llm_pool import BackgroundEventLoop, LLMClientPool, shared_event_loop
+from response_metrics import FanOutMetricsSink, InMemoryMetricsSink, JsonlMetricsSink, MetricsSink, ResponseMetrics, StageTimer
+from embedding_executor import estimate_tokens
+from functools import partial
+import asyncio
 import os
+import shutil
+import time
+
+
+@st.cache_resource
+def get_collection_registry() -> CollectionRegistry:
+    """Coleções de documentos compartilhadas entre as sessões; COLLECTIONS_MEMORY_MB limita os índices em memória."""
+    budget_mb = int(os.environ.get("COLLECTIONS_MEMORY_MB", "2048"))
+    return CollectionRegistry(memory_budget_bytes=budget_mb << 20)
+
+
+@st.cache_resource
+def get_query_embeddings(openai_api_key: str, embedding_model: str) -> Embeddings:
+    """Cliente de embeddings das perguntas, um por chave de API."""
+    from langchain_openai.embeddings import OpenAIEmbeddings
+    return OpenAIEmbeddings(api_key=openai_api_key, model=embedding_model)
+
+
+@st.cache_resource
+def get_query_cache() -> QueryCache:
+    """Cache exato de embeddings e resultados de busca, compartilhado entre sessões."""
+    return QueryCache()
+
+
+@st.cache_resource
+def get_answer_cache() -> SemanticAnswerCache:
+    """Cache semântico de respostas, compartilhado entre sessões."""
+    return SemanticAnswerCache()
+
+
+@st.cache_resource
+def get_llm_pool() -> LLMClientPool:
+    """Clientes de chat reutilizados entre turnos, mantendo as conexões HTTP abertas."""
+    return LLMClientPool()
+
+
+@st.cache_resource
+def get_event_loop() -> BackgroundEventLoop:
+    """Loop assíncrono do processo, onde rodam as respostas e os clientes HTTP em pool."""
+    return shared_event_loop()
+
+
+@st.cache_resource
+def get_metrics() -> InMemoryMetricsSink:
+    """Tempos por etapa das últimas respostas, exibidos na barra lateral."""
+    return InMemoryMetricsSink()
+
+
+@st.cache_resource
+def get_ingestion_jobs() -> IngestionJobQueue:
+    """Fila de ingestões em segundo plano, compartilhada entre sessões."""
+    return IngestionJobQueue()
+
+
+def get_metrics_sink() -> MetricsSink:
+    """Destino das métricas; METRICS_LOG_PATH grava também um arquivo JSONL."""
+    log_path = os.environ.get("METRICS_LOG_PATH")
+    if log_path:
+        return FanOutMetricsSink(get_metrics(), JsonlMetricsSink(log_path))
+    return get_metrics()
 
 
 @dataclass
@@ -23,7 +88,10 @@ class ChatbotConfig:
     groq_api_key: Optional[str] = None
     openai_api_key: Optional[str] = None
     documents: Optional[List] = None
-    processed_docs: Optional[List] = None
+    processed_docs: Optional[int] = None
+    semantic_cache: bool = False
+    retrieval_mode: str = "hybrid"
+    collections: Optional[List[str]] = None
 
 class ChatbotUI:
     """Gerencia a interface do usuário do chatbot."""
@@ -44,6 +112,8 @@ class ChatbotUI:
             st.session_state.rag_documents = None
         if "temp_dir" not in st.session_state:
             st.session_state.temp_dir = None
+        if "collection" not in st.session_state:
+            st.session_state.collection = DEFAULT_COLLECTION
     
     def _setup_page_config(self):
         """Configura a página do Streamlit."""
@@ -55,32 +125,42 @@ class ChatbotUI:
     def reset_chat(self):
         """Limpa o histórico do chat."""
         st.session_state.chat_history = []
+        st.session_state.pop("context_builder", None)
+
+    def get_context_builder(self, model: str) -> ContextBuilder:
+        """Retorna o montador de contexto da sessão, que guarda o resumo incremental da conversa."""
+        builder = st.session_state.get("context_builder")
+        if builder is None or builder.model != model:
+            builder = ContextBuilder(model)
+            st.session_state.context_builder = builder
+        return builder
         
-    def process_documents(self, files, openai_api_key):
-        """Processa os documentos enviados."""
+    def process_documents(self, files, openai_api_key, collection: str = DEFAULT_COLLECTION):
+        """Salva os documentos enviados na coleção e agenda a ingestão em segundo plano."""
         if files and openai_api_key:
             try:
-                local_dir = "documentos"
-                os.makedirs(local_dir, exist_ok=True) 
+                # o loader (parsers, FAISS) só é importado quando há documentos para processar
+                from multi_doc_loader import MultiFileLoader
+                registry = get_collection_registry()
+                local_dir = registry.create(collection)
 
                 for uploaded_file in files:
+                    uploaded_file.seek(0)
                     with open(os.path.join(local_dir, uploaded_file.name), 'wb') as f:
-                        f.write(uploaded_file.getbuffer())
+                        shutil.copyfileobj(uploaded_file, f)
 
-                loader = MultiFileLoader(
+                loader_factory = partial(
+                    MultiFileLoader,
                     directory_path=local_dir,
                     glob_pattern="**/*.*",
                     api_key=openai_api_key,
-                    faiss_index_path=os.path.join(local_dir, "faiss_index_chatbot")
-                )                
-                documents = loader.load()
-                
-                st.session_state.rag_documents = documents
-                st.session_state.processed_documents = True
-
-                st.success(f"Documentos processados com sucesso! Total de documentos: {len(documents)}")
-                
-                return documents
+                    faiss_index_path=registry.index_path(collection)
+                )
+                description = f"{collection}: " + ", ".join(f.name for f in files)
+                job_id = get_ingestion_jobs().submit(loader_factory, description=description)
+                st.session_state.ingestion_job = job_id
+                st.session_state.processed_documents = False
+                return job_id
 
             except Exception as e:
                 st.error(f"Erro ao processar documentos: {str(e)}")
@@ -94,6 +174,38 @@ class ChatbotUI:
                 st.warning("Por favor, insira a chave da API OpenAI para processar os documentos.")
             return None
 
+    @st.fragment(run_every="2s")
+    def render_ingestion_status(self):
+        """Consulta o job de ingestão da sessão sem bloquear o restante da interface."""
+        job_id = st.session_state.get("ingestion_job")
+        job = get_ingestion_jobs().get(job_id) if job_id else None
+        if job is None:
+            if st.session_state.processed_documents:
+                st.success("✓ Processado")
+            else:
+                st.info("Aguardando...")
+            return
+
+        if job.status == DONE:
+            st.session_state.rag_documents = job.total_chunks
+            st.session_state.processed_documents = True
+            st.success(f"Documentos processados com sucesso! Novos trechos indexados: {job.total_chunks}")
+            if job.cache_stats:
+                st.caption(f"Cache de embeddings: {job.cache_stats['hits']} acertos, {job.cache_stats['misses']} chamadas ao provedor.")
+        elif job.status == FAILED:
+            st.session_state.processed_documents = False
+            st.error(f"Erro ao processar documentos: {job.error}")
+        else:
+            progress = job.progress
+            fraction = progress.files_done / progress.files_total if progress.files_total else 0.0
+            if progress.chunks:
+                # a etapa mais lenta é o embedding; pondera pelo que já foi gravado
+                fraction = (fraction + progress.chunks_embedded / progress.chunks) / 2
+            st.progress(
+                min(fraction, 1.0),
+                text=f"Processando: {progress.files_done}/{progress.files_total} arquivos, {progress.chunks_embedded} trechos indexados"
+            )
+
     def render_sidebar(self) -> ChatbotConfig:
         """Renderiza a barra lateral e retorna as configurações."""
         with st.sidebar:
@@ -120,6 +232,30 @@ class ChatbotUI:
             
             st.divider()
             
+            st.subheader("Coleções")
+            registry = get_collection_registry()
+            with st.expander("Nova coleção"):
+                new_collection = st.text_input("Nome da coleção", placeholder="ex.: juridico ou projeto-x")
+                if st.button("Criar coleção"):
+                    try:
+                        registry.create(new_collection.strip().lower())
+                        st.session_state.collection = new_collection.strip().lower()
+                    except ValueError as e:
+                        st.error(str(e))
+            collections = sorted(set(registry.list_collections()) | {DEFAULT_COLLECTION, st.session_state.collection})
+            collection = st.selectbox(
+                "Coleção dos novos documentos",
+                collections,
+                key="collection",
+                help="Cada coleção (por equipe ou projeto) tem seus próprios documentos e índice."
+            )
+            query_collections = st.multiselect(
+                "Consultar nas coleções",
+                collections,
+                default=[collection],
+                help="Com mais de uma coleção, os melhores trechos de todas são combinados."
+            )
+
             # file uploader
             st.subheader("Configuração do RAG")
             uploaded_files = st.file_uploader(
@@ -131,23 +267,19 @@ class ChatbotUI:
 
 
             # botão para processar os documentos do file uploader
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                if st.button('Processar Documentos'):
-                    processed_docs = self.process_documents(uploaded_files, openai_api_key)
-            with col2:
-                if st.session_state.processed_documents:
-                    st.success("✓ Processado")
-                else:
-                    st.info("Aguardando...")
+            if st.button('Processar Documentos', disabled=bool(get_ingestion_jobs().active())):
+                self.process_documents(uploaded_files, openai_api_key, collection)
+            self.render_ingestion_status()
 
             with st.expander("Banco de dados de conhecimento"):
-                st.write("Todos os dados e documentos inseridos ao aplicativo estão contidos no **banco de dados de conhecimento**.")
-                st.write("Para reiniciar o conhecimento da Ada, apague os dados.")
+                st.write("Os dados e documentos de cada coleção estão contidos no **banco de dados de conhecimento**.")
+                st.write(f"Para reiniciar o conhecimento da Ada nesta coleção, apague os dados de **{collection}**; as demais coleções não são afetadas.")
                 if st.button("Apagar dados", type="primary"):
-                    manager_dir = DirectoryManager("documentos")
-                    manager_dir.dir_erase()
-                    st.success("Banco de dados de conhecimento foi reiniciado.")
+                    if get_ingestion_jobs().active():
+                        st.warning("Aguarde o processamento dos documentos terminar antes de apagar os dados.")
+                    else:
+                        registry.erase(collection)
+                        st.success(f"Banco de dados de conhecimento da coleção '{collection}' foi reiniciado.")
             
             st.divider()            
             
@@ -172,6 +304,36 @@ class ChatbotUI:
                 "Selecione o modelo de embeddings",
                 ("text-embedding-3-small",)
             )
+
+            st.subheader("Busca")
+            retrieval_label = st.radio(
+                "Modo de busca nos documentos",
+                ("Híbrida (palavras-chave + semântica)", "Semântica"),
+                help="A busca híbrida encontra códigos e números exatos (contratos, peças) sem consultar o modelo de embeddings."
+            )
+            retrieval_mode = "vector" if retrieval_label == "Semântica" else "hybrid"
+
+            st.subheader("Cache")
+            semantic_cache = st.toggle(
+                "Reutilizar respostas de perguntas semelhantes",
+                value=False,
+                help="Responde perguntas quase idênticas a outras recentes sem chamar o modelo novamente."
+            )
+            with st.expander("Estatísticas do cache"):
+                query_stats = get_query_cache().stats()
+                answer_stats = get_answer_cache().stats()
+                st.write(f"Embeddings de perguntas: {query_stats['embeddings']['hit_rate']:.0%} de acertos")
+                st.write(f"Resultados de busca: {query_stats['results']['hit_rate']:.0%} de acertos")
+                st.write(f"Respostas semânticas: {answer_stats['hit_rate']:.0%} de acertos")
+            with st.expander("Tempos de resposta"):
+                summary = get_metrics().summary()
+                if not summary:
+                    st.write("Nenhuma resposta registrada ainda.")
+                for stage, label in (("search", "Busca"), ("first_token", "Primeiro token"), ("total", "Total")):
+                    if stage in summary:
+                        st.write(f"{label}: p50 {summary[stage]['p50'] * 1000:.0f} ms, p95 {summary[stage]['p95'] * 1000:.0f} ms")
+                if "tokens_per_second" in summary:
+                    st.write(f"Geração: {summary['tokens_per_second']['p50']:.0f} tokens/s")
             
             return ChatbotConfig(
                 base_model=base_model,
@@ -180,7 +342,10 @@ class ChatbotUI:
                 groq_api_key=groq_api_key,
                 openai_api_key=openai_api_key,
                 documents=uploaded_files,
-                processed_docs=st.session_state.get('rag_documents', None)
+                processed_docs=st.session_state.get('rag_documents', None),
+                semantic_cache=semantic_cache,
+                retrieval_mode=retrieval_mode,
+                collections=query_collections
             )
     
     def render_chat_history(self):
@@ -193,6 +358,8 @@ class ChatbotUI:
 class ChatbotBackend:
     """Gerencia a lógica do chatbot."""
     
+    RETRIEVAL_K = 3
+
     CHAT_TEMPLATE = """
     # AVATAR
     Você é uma assistente prestativa, carismática e atenciosa chamada ‘Ada’. 
@@ -223,69 +390,246 @@ class ChatbotBackend:
     Pergunta do usuário: {user_question}
     """
     
-    def __init__(self, config: ChatbotConfig):
+    def __init__(self, config: ChatbotConfig, context_builder: Optional[ContextBuilder] = None, metrics_sink: Optional[MetricsSink] = None):
         self.config = config
         self.prompt = ChatPromptTemplate.from_template(self.CHAT_TEMPLATE)
+        self.context_builder = context_builder or ContextBuilder(config.base_model)
+        self.metrics_sink = metrics_sink
         
     def _get_llm(self):
-        """Retorna o modelo de linguagem apropriado."""
-        if self.config.base_model.startswith("llama"):
-            if not self.config.groq_api_key:
-                raise ValueError("API key da Groq é necessária para modelos Llama")
-            return ChatGroq(
-                model=self.config.base_model,
-                temperature=self.config.temperature,
-                api_key=self.config.groq_api_key
-            )
-        elif self.config.base_model.startswith("gpt"):
-            if not self.config.openai_api_key:
-                raise ValueError("API key da OpenAI é necessária para modelos GPT")
-            return ChatOpenAI(
-                model=self.config.base_model,
-                temperature=self.config.temperature,
-                api_key=self.config.openai_api_key
-            )
-        else:
-            raise ValueError(f"Modelo não suportado: {self.config.base_model}")
+        """Retorna o modelo de linguagem apropriado, reaproveitando o cliente do pool."""
+        return get_llm_pool().get(
+            self.config.base_model,
+            self.config.temperature,
+            groq_api_key=self.config.groq_api_key,
+            openai_api_key=self.config.openai_api_key
+        )
     
     def format_docs(self, docs):
-        return "\n\n".join(doc.page_content for doc in docs)
+        return self.context_builder.build_context(docs)
     
+    def _embeddings(self) -> Embeddings:
+        return get_query_embeddings(self.config.openai_api_key, self.config.embedding_model)
+
+    def _acquire_collections(self) -> List[LoadedCollection]:
+        """Coleções consultadas que já têm índice; só elas são carregadas em memória."""
+        names = self.config.collections or [DEFAULT_COLLECTION]
+        return get_collection_registry().acquire(names, self._embeddings())
+
+    @staticmethod
+    def _generation(collections: List[LoadedCollection]) -> Optional[tuple]:
+        """Versão do conjunto consultado: muda quando qualquer uma das coleções é reindexada."""
+        if not collections:
+            return None
+        return tuple((collection.name, collection.generation) for collection in collections)
+
+    def _embed_query(self, query: str) -> List[float]:
+        query_cache = get_query_cache()
+        embedding = query_cache.get_embedding(self.config.embedding_model, query)
+        if embedding is None:
+            embedding = self._embeddings().embed_query(query)
+            query_cache.put_embedding(self.config.embedding_model, query, embedding)
+        return embedding
+
+    async def _aembed_query(self, query: str) -> List[float]:
+        query_cache = get_query_cache()
+        embedding = query_cache.get_embedding(self.config.embedding_model, query)
+        if embedding is None:
+            embedding = await self._embeddings().aembed_query(query)
+            query_cache.put_embedding(self.config.embedding_model, query, embedding)
+        return embedding
+
+    def _lexical_retrieve(self, collections: List[LoadedCollection], query: str) -> Optional[List[Document]]:
+        """Caminho rápido para buscas por identificador: BM25 local, sem embedding da pergunta."""
+        registry = get_collection_registry()
+        # BM25 fraco: o código não está nos trechos e a busca híbrida decide
+        ids = registry.lexical_search(collections, query, k=self.RETRIEVAL_K, min_score_ratio=KEYWORD_MIN_SCORE_RATIO)
+        if not ids:
+            return None
+        return registry.fetch(collections, ids)
+
+    def _cached_retrieve(self, collections: List[LoadedCollection], generation: Optional[tuple], query: str) -> Optional[List[Document]]:
+        ids = get_query_cache().get_ids(generation, self.config.retrieval_mode, query, self.RETRIEVAL_K)
+        if ids is None:
+            return None
+        return get_collection_registry().fetch(collections, ids)
+
+    def _retrieve(
+            self, collections: List[LoadedCollection],
+            generation: Optional[tuple],
+            query: str,
+            embedding: List[float],
+            lexical_ids: Optional[List[str]] = None
+    ) -> List[Document]:
+        """Busca os trechos relevantes nas coleções, reaproveitando o top-k de perguntas idênticas."""
+        registry = get_collection_registry()
+        query_cache = get_query_cache()
+        docs = self._cached_retrieve(collections, generation, query)
+        if docs is not None:
+            return docs
+
+        if self.config.retrieval_mode == "hybrid":
+            # busca mais candidatos em cada índice e combina por reciprocal rank fusion
+            fetch_k = self.RETRIEVAL_K * 4
+            vector_docs = registry.search(collections, embedding, k=fetch_k)
+            if lexical_ids is None:
+                lexical_ids = registry.lexical_search(collections, query, k=fetch_k)
+            if all(doc.id for doc in vector_docs):
+                fused_ids = reciprocal_rank_fusion([[doc.id for doc in vector_docs], lexical_ids])[:self.RETRIEVAL_K]
+                by_id = {doc.id: doc for doc in vector_docs}
+                missing = [doc_id for doc_id in fused_ids if doc_id not in by_id]
+                by_id.update({doc.id: doc for doc in registry.fetch(collections, missing) or []})
+                docs = [by_id[doc_id] for doc_id in fused_ids if doc_id in by_id]
+                query_cache.put_ids(generation, self.config.retrieval_mode, query, self.RETRIEVAL_K, [doc.id for doc in docs])
+                return docs
+            docs = vector_docs[:self.RETRIEVAL_K]
+        else:
+            docs = registry.search(collections, embedding, k=self.RETRIEVAL_K)
+
+        if all(doc.id for doc in docs):
+            query_cache.put_ids(generation, self.config.retrieval_mode, query, self.RETRIEVAL_K, [doc.id for doc in docs])
+        return docs
+
+    def _cache_answer(self, stream: Iterator[str], scope: tuple, query: str, embedding: List[float]) -> Iterator[str]:
+        parts = []
+        for chunk in stream:
+            parts.append(chunk)
+            yield chunk
+        get_answer_cache().store(scope, query, embedding, "".join(parts))
+
     def get_response(self, query: str, chat_history: List) -> Iterator[str]:
         """Gera uma resposta do chatbot."""
-        embedding_fn = OpenAIEmbeddings(api_key=self.config.openai_api_key)
-        
-        if not os.path.exists("./documentos/faiss_index_chatbot"):
-            # verifica se possui algum documento processado, se não, usa apenas a LLM
-            chain = self.prompt | self._get_llm() | StrOutputParser()
-            return chain.stream({
-                "context": "",
-                "chat_history": chat_history,
-                "user_question": query,
-            })
-        
-        # se possuir os documentos, realiza o RAG
-        vectorstore = FAISS.load_local(
-            "./documentos/faiss_index_chatbot", 
-            embeddings=embedding_fn,
-            allow_dangerous_deserialization=True
-        )
-        
-        chain = (
-            RunnablePassthrough.assign(
-                context=lambda x: self.format_docs(
-                    vectorstore.similarity_search(x["user_question"], k=3)
-                )
-            )
-            | self.prompt
-            | self._get_llm()
-            | StrOutputParser()
-        )
-        
-        return chain.stream({
-            "chat_history": chat_history,
+        collections = []
+        embedding = None
+        if self.config.openai_api_key:
+            collections = self._acquire_collections()
+        generation = self._generation(collections)
+
+        # buscas por identificador (contratos, códigos de peças) dispensam o embedding
+        lexical_docs = None
+        if collections and self.config.retrieval_mode == "hybrid" and is_keyword_query(query):
+            lexical_docs = self._lexical_retrieve(collections, query)
+
+        if lexical_docs is None and self.config.openai_api_key:
+            if collections or self.config.semantic_cache:
+                embedding = self._embed_query(query)
+
+        use_answer_cache = self.config.semantic_cache and embedding is not None
+        scope = (generation, self.config.retrieval_mode, self.config.base_model, self.config.temperature)
+        if use_answer_cache:
+            cached_answer = get_answer_cache().lookup(scope, embedding)
+            if cached_answer is not None:
+                return iter([cached_answer])
+
+        # se possuir os documentos, realiza o RAG; se não, usa apenas a LLM
+        context = ""
+        if lexical_docs is not None:
+            context = self.format_docs(lexical_docs)
+        elif collections:
+            context = self.format_docs(self._retrieve(collections, generation, query, embedding))
+
+        chain = self.prompt | self._get_llm() | StrOutputParser()
+        stream = chain.stream({
+            "context": context,
+            "chat_history": self.context_builder.build_history(chat_history),
             "user_question": query,
         })
+        if use_answer_cache:
+            return self._cache_answer(stream, scope, query, embedding)
+        return stream
+
+    def _record_metrics(self, metrics: ResponseMetrics):
+        if self.metrics_sink is None:
+            return
+        try:
+            self.metrics_sink.record(metrics)
+        except Exception as e:
+            print(f"Erro ao registrar métricas: {e}")
+
+    async def aget_response(self, query: str, chat_history: List) -> AsyncIterator[str]:
+        """Versão assíncrona de get_response, com etapas sobrepostas e medidas.
+
+        A conexão com o provedor do LLM é aberta enquanto a busca acontece, e no
+        modo híbrido a busca BM25 roda junto com o embedding da pergunta. Os
+        tempos de cada etapa vão para o `metrics_sink` ao final da resposta.
+        """
+        metrics = ResponseMetrics(model=self.config.base_model)
+        timer = StageTimer(metrics)
+        pool = get_llm_pool()
+        llm = self._get_llm()
+        warm_task = asyncio.create_task(pool.warm(llm))
+        try:
+            collections = []
+            embedding = None
+            hybrid = self.config.retrieval_mode == "hybrid"
+            if self.config.openai_api_key:
+                with timer.stage("load"):
+                    collections = await asyncio.to_thread(self._acquire_collections)
+            generation = self._generation(collections)
+
+            docs = None
+            if collections and hybrid and is_keyword_query(query):
+                with timer.stage("search"):
+                    docs = await asyncio.to_thread(self._lexical_retrieve, collections, query)
+                metrics.lexical_fast_path = docs is not None
+
+            if docs is None and self.config.openai_api_key and (collections or self.config.semantic_cache):
+                lexical_task = None
+                if collections and hybrid:
+                    lexical_task = asyncio.create_task(asyncio.to_thread(
+                        get_collection_registry().lexical_search, collections, query, self.RETRIEVAL_K * 4
+                    ))
+                with timer.stage("embed"):
+                    embedding = await self._aembed_query(query)
+                lexical_ids = await lexical_task if lexical_task is not None else None
+
+                use_answer_cache = self.config.semantic_cache
+                scope = (generation, self.config.retrieval_mode, self.config.base_model, self.config.temperature)
+                if use_answer_cache:
+                    cached_answer = get_answer_cache().lookup(scope, embedding)
+                    if cached_answer is not None:
+                        metrics.answer_cache_hit = True
+                        timer.mark("first_token")
+                        yield cached_answer
+                        return
+
+                if collections:
+                    with timer.stage("search"):
+                        docs = await asyncio.to_thread(self._retrieve, collections, generation, query, embedding, lexical_ids)
+            else:
+                use_answer_cache = False
+
+            # se possuir os documentos, realiza o RAG; se não, usa apenas a LLM
+            with timer.stage("prompt"):
+                context = self.format_docs(docs) if docs is not None else ""
+                history = self.context_builder.build_history(chat_history)
+
+            chain = self.prompt | llm | StrOutputParser()
+            parts = []
+            first_token_at = None
+            async for chunk in chain.astream({
+                "context": context,
+                "chat_history": history,
+                "user_question": query,
+            }):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    timer.mark("first_token")
+                parts.append(chunk)
+                yield chunk
+            pool.mark_used(llm)
+
+            answer = "".join(parts)
+            if first_token_at is not None:
+                timer.mark("generation", since=first_token_at)
+                metrics.output_tokens = estimate_tokens(answer)
+            if use_answer_cache:
+                get_answer_cache().store(scope, query, embedding, answer)
+        finally:
+            if not warm_task.done():
+                warm_task.cancel()
+            timer.mark("total")
+            self._record_metrics(metrics)
 
 def main():
     """Função principal do aplicativo."""
@@ -307,10 +651,11 @@ def main():
             
         try:
             # gerar e exibir resposta
-            backend = ChatbotBackend(config)
+            backend = ChatbotBackend(config, ui.get_context_builder(config.base_model), metrics_sink=get_metrics_sink())
             with st.chat_message("AI"):
                 with st.spinner("Pensando..."):
-                    response = st.write_stream(backend.get_response(user_query, st.session_state.chat_history))
+                    response_stream = backend.aget_response(user_query, st.session_state.chat_history)
+                    response = st.write_stream(get_event_loop().iterate(response_stream))
                     
             st.session_state.chat_history.append(AIMessage(content=response))
             
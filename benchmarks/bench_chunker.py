@@ -0,0 +1,80 @@
+"""Compara vazão e distribuição de tamanhos do StreamingChunker com o splitter anterior.
+
+O splitter anterior é o RecursiveCharacterTextSplitter com separators="\\n",
+como o MultiFileLoader usava, com os mesmos tamanhos convertidos para
+caracteres (~4 por token). O texto sintético mistura parágrafos quebrados
+em linhas curtas (como sai de PDFs) e parágrafos numa linha só (como
+exportações de sistemas).
+
+    python -m benchmarks.bench_chunker --megabytes 50 --workers 1 4
+"""
+from benchmarks.corpus import TextGenerator, _wrap
+from chunker import StreamingChunker
+from embedding_executor import estimate_tokens
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from typing import List
+import argparse
+import statistics
+import time
+
+
+def synthetic_documents(megabytes: float, chars_per_document: int = 200_000) -> List[Document]:
+    generator = TextGenerator(seed=0)
+    documents = []
+    total = 0
+    while total < megabytes * 1_000_000:
+        paragraphs = []
+        length = 0
+        while length < chars_per_document:
+            paragraph = generator.paragraph(generator.rng.choice((300, 900, 2500)))
+            # metade dos parágrafos vem quebrada em linhas curtas
+            text = "\n".join(_wrap(paragraph)) if generator.rng.random() < 0.5 else paragraph
+            paragraphs.append(text)
+            length += len(text) + 2
+        content = "\n\n".join(paragraphs)
+        documents.append(Document(page_content=content, metadata={"source": f"doc_{len(documents)}"}))
+        total += len(content)
+    return documents
+
+
+def report(name: str, chunks: List[str], elapsed: float, megabytes: float, target_tokens: int):
+    sizes = sorted(estimate_tokens(chunk) for chunk in chunks)
+    deciles = statistics.quantiles(sizes, n=10)
+    tiny = sum(size < target_tokens // 4 for size in sizes) / len(sizes)
+    oversized = sum(size > target_tokens for size in sizes) / len(sizes)
+    print(
+        f"{name:>22} {megabytes / elapsed:>7.1f} {len(chunks):>8} {deciles[0]:>6.0f} {statistics.median(sizes):>6.0f} "
+        f"{deciles[-1]:>6.0f} {sizes[-1]:>6} {tiny:>7.1%} {oversized:>7.1%} {sum(sizes):>10}"
+    )
+
+
+def run(megabytes: float, chunk_size: int, chunk_overlap: int, workers_list):
+    documents = synthetic_documents(megabytes)
+    megabytes = sum(len(document.page_content) for document in documents) / 1_000_000
+    print(f"{len(documents)} documentos, {megabytes:.1f} MB; alvo de {chunk_size} tokens por chunk")
+    print(
+        f"{'splitter':>22} {'MB/s':>7} {'chunks':>8} {'p10':>6} {'p50':>6} {'p90':>6} {'máx':>6} "
+        f"{'<25%':>7} {'>alvo':>7} {'tokens':>10}"
+    )
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size * 4, chunk_overlap=chunk_overlap * 4, separators="\n")
+    start = time.perf_counter()
+    chunks = [chunk.page_content for chunk in splitter.split_documents(documents)]
+    report("recursive (anterior)", chunks, time.perf_counter() - start, megabytes, chunk_size)
+
+    chunker = StreamingChunker(chunk_size, chunk_overlap)
+    for workers in workers_list:
+        start = time.perf_counter()
+        chunks = [chunk.page_content for chunk in chunker.split_documents(documents, max_workers=workers, batch_size=4)]
+        report(f"streaming ({workers} proc.)", chunks, time.perf_counter() - start, megabytes, chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=50)
+    parser.add_argument("--chunk-size", type=int, default=256, help="em tokens; o splitter anterior usa 4x em caracteres")
+    parser.add_argument("--chunk-overlap", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+    run(args.megabytes, args.chunk_size, args.chunk_overlap, args.workers)
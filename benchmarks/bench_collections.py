@@ -0,0 +1,102 @@
+"""Coleções: latência da busca distribuída entre coleções e comportamento do LRU sob orçamento de memória.
+
+Cria N coleções sintéticas no layout do app (documentos/<coleção>/) e mede:
+o p50/p99 da busca vetorial + BM25 consultando 1, 2, 4... coleções ao mesmo
+tempo, e, com um orçamento que comporta só parte delas, quantas cargas e
+descargas acontecem num tráfego concentrado em poucas coleções (Zipf).
+
+    python -m benchmarks.bench_collections --collections 8 --vectors 50000 --dim 384
+"""
+from benchmarks.fakes import HashEmbeddings, synthetic_texts
+from collection_registry import CollectionRegistry, estimate_index_bytes
+from lexical_index import LEXICAL_INDEX_FILE, LexicalIndex
+from segment_store import SegmentStore
+from vector_store_manager import bump_index_generation
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+import numpy as np
+
+
+def build_collection(registry: CollectionRegistry, name: str, n_vectors: int, dim: int, seed: int):
+    index_path = registry.index_path(name)
+    segment_store = SegmentStore(index_path)
+    store = segment_store.create(HashEmbeddings(dim), dim)
+    lexical = LexicalIndex(os.path.join(index_path, LEXICAL_INDEX_FILE))
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_vectors, 10_000):
+        count = min(10_000, n_vectors - start)
+        vectors = rng.normal(size=(count, dim)).astype("float32")
+        ids = [str(uuid.uuid4()) for _ in range(count)]
+        texts = [f"{text} contrato {name.upper()}-{start + i:06d}" for i, text in enumerate(synthetic_texts(count, 40, seed + start))]
+        store.add_embeddings(list(zip(texts, vectors.tolist())), ids=ids)
+        segment_store.append(ids, vectors)
+        lexical.add(ids, texts)
+    segment_store.compact(store, background=False)
+    bump_index_generation(index_path)
+    lexical.close()
+
+
+def _p99(values):
+    return statistics.quantiles(values, n=100)[98] if len(values) > 1 else values[0]
+
+
+def run(n_collections: int, n_vectors: int, dim: int, n_queries: int, budget_collections: int):
+    embeddings = HashEmbeddings(dim)
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = CollectionRegistry(tmp)
+        names = [f"equipe-{i:02d}" for i in range(n_collections)]
+        start = time.perf_counter()
+        for seed, name in enumerate(names):
+            build_collection(registry, name, n_vectors, dim, seed)
+        collection_bytes = estimate_index_bytes(registry.index_path(names[0]))
+        print(f"{n_collections} coleções de {n_vectors} vetores ({collection_bytes / 1e6:.1f} MB cada) em {time.perf_counter() - start:.1f}s")
+
+        rng = np.random.default_rng(1)
+        queries = [rng.normal(size=dim).astype("float32").tolist() for _ in range(n_queries)]
+        print(f"\n{'coleções':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        fan_out = 1
+        while fan_out <= n_collections:
+            collections = registry.acquire(names[:fan_out], embeddings)
+            latencies = []
+            for i, vector in enumerate(queries):
+                start = time.perf_counter()
+                registry.search(collections, vector, k=12)
+                registry.lexical_search(collections, f"contrato EQUIPE-00-{i:06d}", k=12)
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(f"{fan_out:>9} {statistics.median(latencies):>9.2f} {_p99(latencies):>9.2f}")
+            fan_out *= 2
+
+        # tráfego concentrado: poucas coleções recebem a maior parte das perguntas
+        registry = CollectionRegistry(tmp, memory_budget_bytes=collection_bytes * budget_collections)
+        weights = [1 / (rank + 1) for rank in range(n_collections)]
+        picks = random.Random(2).choices(names, weights=weights, k=n_queries)
+        cold, warm = [], []
+        for name, vector in zip(picks, queries):
+            was_loaded = name in registry.memory_usage()
+            start = time.perf_counter()
+            collections = registry.acquire([name], embeddings)
+            registry.search(collections, vector, k=3)
+            (warm if was_loaded else cold).append((time.perf_counter() - start) * 1000)
+        resident = sum(registry.memory_usage().values())
+        print(
+            f"\norçamento de {budget_collections} coleções: {len(warm)} consultas com a coleção já em memória "
+            f"(p50 {statistics.median(warm) if warm else 0:.2f} ms), {len(cold)} cargas "
+            f"(p50 {statistics.median(cold) if cold else 0:.2f} ms), {registry.evictions} descargas, "
+            f"{resident / 1e6:.1f} MB residentes de {collection_bytes * n_collections / 1e6:.1f} MB no total"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", type=int, default=8)
+    parser.add_argument("--vectors", type=int, default=50_000, help="vetores por coleção")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--budget-collections", type=int, default=3, help="orçamento de memória, em coleções")
+    args = parser.parse_args()
+    run(args.collections, args.vectors, args.dim, args.queries, args.budget_collections)
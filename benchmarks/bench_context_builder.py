@@ -0,0 +1,49 @@
+"""Mostra o tamanho do prompt ao longo de uma conversa sintética longa.
+
+Compara o histórico completo (comportamento anterior) com o ContextBuilder,
+que mantém uma janela recente mais um resumo incremental.
+
+    python -m benchmarks.bench_context_builder --turns 200
+"""
+from benchmarks.fakes import synthetic_texts
+from context_builder import ContextBuilder
+from embedding_executor import estimate_tokens
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+import argparse
+import time
+
+
+def run(turns: int, model: str, report_every: int):
+    questions = synthetic_texts(turns, words_per_text=25, seed=1)
+    answers = synthetic_texts(turns, words_per_text=180, seed=2)
+    # chunks com a sobreposição de 200 caracteres do splitter
+    text = " ".join(synthetic_texts(20, words_per_text=100, seed=3))
+    docs = [Document(page_content=text[i:i + 1000]) for i in range(0, 2400, 800)]
+
+    builder = ContextBuilder(model)
+    history = []
+    build_times = []
+    print(f"{'turno':>6} {'tokens (histórico completo)':>28} {'tokens (ContextBuilder)':>24}")
+    for turn in range(1, turns + 1):
+        history.append(HumanMessage(content=questions[turn - 1]))
+
+        naive = estimate_tokens("\n\n".join(doc.page_content for doc in docs)) + estimate_tokens(str(history))
+        start = time.perf_counter()
+        bounded = estimate_tokens(builder.build_context(docs)) + estimate_tokens(builder.build_history(history))
+        build_times.append(time.perf_counter() - start)
+
+        history.append(AIMessage(content=answers[turn - 1]))
+        if turn % report_every == 0:
+            print(f"{turn:>6} {naive:>28} {bounded:>24}")
+    print(f"orçamento do modelo {model}: {builder.budget} tokens; "
+          f"montagem média: {sum(build_times) / len(build_times) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--model", default="llama-3.1-8b-instant")
+    parser.add_argument("--report-every", type=int, default=20)
+    args = parser.parse_args()
+    run(args.turns, args.model, args.report_every)
@@ -0,0 +1,68 @@
+"""Simula um provedor com cota por minuto e mede a vazão do EmbeddingExecutor.
+
+O backend falso responde com erro 429 quando a cota é excedida, permitindo
+comparar quantas requisições são rejeitadas com e sem o limitador local.
+
+    python -m benchmarks.bench_embedding_executor --texts 5000 --rpm 600
+"""
+from benchmarks.fakes import HashEmbeddings, synthetic_texts
+from embedding_executor import EmbeddingExecutor, LangChainEmbeddingBackend
+import argparse
+import asyncio
+import time
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class QuotaFakeBackend(LangChainEmbeddingBackend):
+    """Backend determinístico que rejeita requisições acima da cota por minuto."""
+
+    def __init__(self, requests_per_minute: int, latency: float = 0.02):
+        super().__init__(HashEmbeddings())
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.window = []
+        self.rejected = 0
+
+    async def aembed(self, texts):
+        now = time.monotonic()
+        self.window = [t for t in self.window if now - t < 60]
+        if len(self.window) >= self.requests_per_minute:
+            self.rejected += 1
+            raise RateLimitError("429 Too Many Requests")
+        self.window.append(now)
+        await asyncio.sleep(self.latency)
+        return self.embeddings.embed_documents(texts)
+
+
+def run(texts_count: int, rpm: int, batch_size: int, concurrency: int):
+    texts = synthetic_texts(texts_count, words_per_text=50)
+    print(f"{'limitador':>10} {'tempo (s)':>10} {'textos/s':>10} {'requisições':>12} {'429s':>6}")
+    for limited in (False, True):
+        backend = QuotaFakeBackend(rpm)
+        executor = EmbeddingExecutor(
+            backend,
+            batch_size=batch_size,
+            max_concurrency=concurrency,
+            requests_per_minute=rpm if limited else None,
+            base_delay=0.05,
+            max_delay=2.0,
+            max_retries=50
+        )
+        start = time.perf_counter()
+        vectors = executor.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(texts)
+        print(f"{'sim' if limited else 'não':>10} {elapsed:>10.2f} {len(texts) / elapsed:>10.1f} {executor.requests:>12} {backend.rejected:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    run(args.texts, args.rpm, args.batch_size, args.concurrency)
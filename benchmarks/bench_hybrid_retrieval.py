@@ -0,0 +1,79 @@
+"""Latência e recall de buscas por identificador: vetorial, BM25 e híbrida (RRF).
+
+Cada documento sintético contém um código único (ex.: CT-2024-000123); as
+consultas pedem esse código, como fazem usuários das áreas jurídica e de
+engenharia. A latência vetorial inclui o tempo de um round-trip simulado
+ao provedor de embeddings.
+
+    python -m benchmarks.bench_hybrid_retrieval --docs 50000 --queries 200
+"""
+from benchmarks.fakes import HashEmbeddings, synthetic_texts
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from langchain_community.vectorstores import FAISS
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def run(n_docs: int, n_queries: int, k: int, embedding_latency: float):
+    texts = synthetic_texts(n_docs, words_per_text=80)
+    codes = [f"CT-2024-{i:06d}" for i in range(n_docs)]
+    texts = [f"{text} contrato {code} {text[:80]}" for text, code in zip(texts, codes)]
+    ids = [str(i) for i in range(n_docs)]
+
+    embeddings = HashEmbeddings()
+    start = time.perf_counter()
+    store = FAISS.from_texts(texts, embeddings, ids=ids)
+    vector_build = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lexical = LexicalIndex(os.path.join(tmp, "lexical.sqlite"))
+        start = time.perf_counter()
+        for i in range(0, n_docs, 1000):
+            lexical.add(ids[i:i + 1000], texts[i:i + 1000])
+        lexical_build = time.perf_counter() - start
+
+        rng = random.Random(0)
+        targets = rng.sample(range(n_docs), n_queries)
+        results = {"vetorial": ([], 0), "bm25": ([], 0), "híbrida": ([], 0)}
+
+        for target in targets:
+            query = f"contrato {codes[target]}"
+
+            start = time.perf_counter()
+            time.sleep(embedding_latency)
+            vector_ids = [doc.id for doc in store.similarity_search(query, k=k * 4)]
+            vector_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            lexical_ids = [doc_id for doc_id, _ in lexical.search(query, k=k * 4)]
+            lexical_time = time.perf_counter() - start
+
+            fused = reciprocal_rank_fusion([vector_ids, lexical_ids])[:k]
+            for name, found, elapsed in (
+                ("vetorial", vector_ids[:k], vector_time),
+                ("bm25", lexical_ids[:k], lexical_time),
+                ("híbrida", fused, vector_time + lexical_time),
+            ):
+                latencies, hits = results[name]
+                latencies.append(elapsed * 1000)
+                results[name] = (latencies, hits + (str(target) in found))
+
+    print(f"construção: FAISS {vector_build:.2f}s, BM25 {lexical_build:.2f}s")
+    print(f"{'modo':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {f'recall@{k}':>10}")
+    for name, (latencies, hits) in results.items():
+        p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+        print(f"{name:>10} {statistics.median(latencies):>9.2f} {p99:>9.2f} {hits / n_queries:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--embedding-latency", type=float, default=0.15, help="round-trip simulado do embedding, em segundos")
+    args = parser.parse_args()
+    run(args.docs, args.queries, args.k, args.embedding_latency)
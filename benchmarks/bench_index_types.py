@@ -0,0 +1,57 @@
+"""Compara recall@k, latência e memória dos tipos de índice com o flat como referência.
+
+Usa vetores sintéticos agrupados, sem acesso à rede.
+
+    python -m benchmarks.bench_index_types --vectors 200000 --dim 1536
+"""
+from faiss_index_factory import build_index
+import argparse
+import time
+import faiss
+import numpy as np
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(n, dim)).astype("float32")
+    return vectors.astype("float32")
+
+
+def recall_at_k(expected: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(e) & set(f)) for e, f in zip(expected, found))
+    return hits / expected.size
+
+
+def run(n_vectors: int, dim: int, n_queries: int, k: int, nprobe: int, index_types):
+    vectors = synthetic_vectors(n_vectors, dim)
+    queries = synthetic_vectors(n_queries, dim, seed=1)
+
+    baseline = build_index(vectors, "flat")
+    _, expected = baseline.search(queries, k)
+
+    print(f"{'tipo':>6} {'build (s)':>10} {'ms/consulta':>12} {f'recall@{k}':>10} {'memória (MB)':>13}")
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = build_index(vectors, index_type, nprobe=nprobe)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        latency = (time.perf_counter() - start) * 1000 / n_queries
+
+        memory = faiss.serialize_index(index).nbytes / 2**20
+        print(f"{index_type:>6} {build_time:>10.2f} {latency:>12.3f} {recall_at_k(expected, found):>10.3f} {memory:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--types", nargs="+", default=["flat", "ivf", "hnsw", "sq8", "ivfpq"])
+    args = parser.parse_args()
+    run(args.vectors, args.dim, args.queries, args.k, args.nprobe, args.types)
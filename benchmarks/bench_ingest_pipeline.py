@@ -0,0 +1,52 @@
+"""Mede a vazão de ingestão do MultiFileLoader com diferentes números de workers.
+
+Gera um corpus sintético de arquivos .txt e usa embeddings falsos, sem rede.
+
+    python -m benchmarks.bench_ingest_pipeline --files 500 --workers 1 2 4 8
+"""
+from benchmarks.fakes import HashEmbeddings, synthetic_texts
+from multi_doc_loader import MultiFileLoader
+import argparse
+import os
+import tempfile
+import time
+
+
+def write_corpus(directory: str, files: int, paragraphs_per_file: int):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(files):
+        paragraphs = synthetic_texts(paragraphs_per_file, words_per_text=60, seed=i)
+        with open(os.path.join(directory, f"doc_{i:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(paragraphs))
+
+
+def run(files: int, paragraphs_per_file: int, workers_list, batch_size: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = os.path.join(tmp, "documentos")
+        write_corpus(corpus_dir, files, paragraphs_per_file)
+        print(f"{'workers':>8} {'tempo (s)':>10} {'arquivos/s':>11} {'chunks/s':>10}")
+        for workers in workers_list:
+            index_path = os.path.join(tmp, f"faiss_index_{workers}")
+            loader = MultiFileLoader(
+                directory_path=corpus_dir,
+                glob_pattern="**/*.*",
+                faiss_index_path=index_path,
+                embedding_cache_path=None,
+                max_workers=workers,
+                embedding_batch_size=batch_size,
+                embeddings=HashEmbeddings()
+            )
+            start = time.perf_counter()
+            chunks = loader.load()
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8} {elapsed:>10.2f} {files / elapsed:>11.1f} {chunks / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--paragraphs-per-file", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    run(args.files, args.paragraphs_per_file, args.workers, args.batch_size)
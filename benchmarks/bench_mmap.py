@@ -0,0 +1,127 @@
+"""Compara tempo de inicialização e memória de leitores do índice com e sem mmap.
+
+Cada modo sobe `--readers` subprocessos ao mesmo tempo, como workers do
+Streamlit que carregam o índice e respondem a uma consulta. A memória vem de
+/proc/<pid>/smaps_rollup (Linux): o RSS conta as páginas mapeadas de cada
+processo, mesmo as compartilhadas pelo page cache; o PSS divide essas páginas
+entre os leitores e o USS conta só as privadas. Com mmap, o USS e o PSS total
+devem ficar bem abaixo do RSS somado.
+
+O mmap dos índices flat depende de IO_FLAG_MMAP_IFC (faiss-cpu >= 1.11);
+em versões anteriores só os índices IVF são mapeados e os flat são lidos
+inteiros em memória.
+
+    python -m benchmarks.bench_mmap --vectors 200000 --dim 1536 --readers 4
+"""
+from benchmarks.fakes import HashEmbeddings
+from segment_store import SegmentStore
+from typing import Dict, List
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import uuid
+import os
+import numpy as np
+
+READER = """
+import json, sys, time
+start = time.perf_counter()
+from benchmarks.fakes import HashEmbeddings
+from segment_store import load_vector_store
+store = load_vector_store(sys.argv[1], HashEmbeddings(int(sys.argv[3])), mmap=sys.argv[2] == "1")
+loaded = time.perf_counter() - start
+store.similarity_search("consulta de teste", k=3)
+first_query = time.perf_counter() - start
+print(json.dumps({"load_s": loaded, "first_query_s": first_query}), flush=True)
+# mantém o índice carregado até o processo pai medir a memória
+sys.stdin.read()
+"""
+
+
+def build(index_path: str, n_vectors: int, dim: int):
+    segment_store = SegmentStore(index_path)
+    store = segment_store.create(HashEmbeddings(dim), dim)
+    rng = np.random.default_rng(0)
+    for start in range(0, n_vectors, 10_000):
+        count = min(10_000, n_vectors - start)
+        vectors = rng.normal(size=(count, dim)).astype("float32")
+        ids = [str(uuid.uuid4()) for _ in range(count)]
+        store.add_embeddings(
+            [(f"trecho {start + i}", vector) for i, vector in enumerate(vectors.tolist())],
+            ids=ids
+        )
+        segment_store.append(ids, vectors)
+    segment_store.compact(store, background=False)
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    """RSS, PSS e USS do processo, em MB, a partir de /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def measure(index_path: str, dim: int, mmap: bool, readers: int) -> List[Dict[str, float]]:
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", READER, index_path, "1" if mmap else "0", str(dim)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(readers)
+    ]
+    results = []
+    try:
+        # todos os leitores com o índice carregado ao mesmo tempo: o PSS divide as páginas compartilhadas
+        for process in processes:
+            results.append(json.loads(process.stdout.readline()))
+        for process, result in zip(processes, results):
+            result.update(memory_mb(process.pid))
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+    return results
+
+
+def run(n_vectors: int, dim: int, readers: int):
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("Este benchmark lê /proc/<pid>/smaps_rollup e só roda no Linux.")
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "faiss_index_chatbot")
+        build(index_path, n_vectors, dim)
+        print(f"{readers} leitores simultâneos; memória por leitor (mediana) e PSS somado")
+        print(
+            f"{'mmap':>6} {'carga (s)':>10} {'1ª consulta (s)':>16} {'RSS (MB)':>9} "
+            f"{'PSS (MB)':>9} {'USS (MB)':>9} {'PSS total (MB)':>15}"
+        )
+        for mmap in (False, True):
+            results = measure(index_path, dim, mmap, readers)
+
+            def median(key: str) -> float:
+                return statistics.median(result[key] for result in results)
+
+            print(
+                f"{'sim' if mmap else 'não':>6} {median('load_s'):>10.2f} {median('first_query_s'):>16.2f} "
+                f"{median('rss'):>9.1f} {median('pss'):>9.1f} {median('uss'):>9.1f} "
+                f"{sum(result['pss'] for result in results):>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--readers", type=int, default=4, help="leitores carregando o índice ao mesmo tempo")
+    args = parser.parse_args()
+    run(args.vectors, args.dim, args.readers)
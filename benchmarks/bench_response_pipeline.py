@@ -0,0 +1,98 @@
+"""Compara o tempo até o primeiro token do caminho antigo com o pipeline assíncrono.
+
+Usa o servidor local de benchmarks/stub_llm_server.py, que cobra uma latência
+por conexão nova. O caminho antigo cria um cliente por pergunta e faz busca e
+geração em sequência; o novo reaproveita o cliente do LLMClientPool e abre a
+conexão enquanto a busca (simulada) acontece.
+
+    python -m benchmarks.bench_response_pipeline --turns 20 --search-latency 0.1
+"""
+from benchmarks.stub_llm_server import start_server
+from llm_pool import LLMClientPool, create_llm
+from response_metrics import InMemoryMetricsSink, ResponseMetrics, StageTimer
+from embedding_executor import estimate_tokens
+import argparse
+import asyncio
+import os
+import time
+
+
+def sequential_turn(search_latency: float, sink: InMemoryMetricsSink):
+    metrics = ResponseMetrics(model="gpt-4o-mini")
+    timer = StageTimer(metrics)
+    with timer.stage("search"):
+        time.sleep(search_latency)
+    llm = create_llm("gpt-4o-mini", 0.0, openai_api_key="stub")
+    first_token_at = None
+    parts = []
+    for chunk in llm.stream("pergunta"):
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+            timer.mark("first_token")
+        parts.append(chunk.content)
+    timer.mark("generation", since=first_token_at)
+    metrics.output_tokens = estimate_tokens("".join(parts))
+    timer.mark("total")
+    sink.record(metrics)
+
+
+async def pooled_turn(pool: LLMClientPool, search_latency: float, sink: InMemoryMetricsSink):
+    metrics = ResponseMetrics(model="gpt-4o-mini")
+    timer = StageTimer(metrics)
+    llm = pool.get("gpt-4o-mini", 0.0, openai_api_key="stub")
+    warm_task = asyncio.create_task(pool.warm(llm))
+    with timer.stage("search"):
+        await asyncio.sleep(search_latency)
+    await warm_task
+    first_token_at = None
+    parts = []
+    async for chunk in llm.astream("pergunta"):
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+            timer.mark("first_token")
+        parts.append(chunk.content)
+    pool.mark_used(llm)
+    timer.mark("generation", since=first_token_at)
+    metrics.output_tokens = estimate_tokens("".join(parts))
+    timer.mark("total")
+    sink.record(metrics)
+
+
+async def run_pooled(turns: int, search_latency: float, think_time: float, sink: InMemoryMetricsSink):
+    pool = LLMClientPool()
+    for _ in range(turns):
+        await pooled_turn(pool, search_latency, sink)
+        await asyncio.sleep(think_time)
+
+
+def report(name: str, sink: InMemoryMetricsSink):
+    summary = sink.summary()
+    first_token = summary["first_token"]
+    total = summary["total"]
+    print(
+        f"{name:>12}: primeiro token p50 {first_token['p50'] * 1000:.0f} ms / p95 {first_token['p95'] * 1000:.0f} ms, "
+        f"total p50 {total['p50'] * 1000:.0f} ms, {summary['tokens_per_second']['p50']:.0f} tokens/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--search-latency", type=float, default=0.1, help="tempo simulado de embedding + busca, em segundos")
+    parser.add_argument("--connect-latency", type=float, default=0.15, help="custo simulado de uma conexão nova")
+    parser.add_argument("--think-time", type=float, default=1.0, help="intervalo entre as perguntas do usuário")
+    args = parser.parse_args()
+
+    server, base_url = start_server(connect_latency=args.connect_latency, first_token_latency=0.2)
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    sequential = InMemoryMetricsSink()
+    for _ in range(args.turns):
+        sequential_turn(args.search_latency, sequential)
+        time.sleep(args.think_time)
+    report("sequencial", sequential)
+
+    pooled = InMemoryMetricsSink()
+    asyncio.run(run_pooled(args.turns, args.search_latency, args.think_time, pooled))
+    report("assíncrono", pooled)
+    server.shutdown()
@@ -0,0 +1,95 @@
+"""Tempo de início do app: importação de app.py e primeira renderização, em processos novos.
+
+Cada medida roda num subprocesso limpo, como um worker novo do Streamlit. O
+modo "anterior" importa antes o que app.py e multi_doc_loader.py carregavam
+no topo (SDKs da Groq e da OpenAI, FAISS, loaders de documentos, openpyxl),
+reproduzindo o custo de antes dos imports sob demanda. A primeira
+renderização usa o AppTest do Streamlit, que executa o script inteiro sem
+navegador.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER_IMPORTS = """
+from langchain_groq import ChatGroq
+from langchain_openai import ChatOpenAI
+from langchain_openai.embeddings import OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_community.document_loaders import PyPDFLoader, CSVLoader, UnstructuredWordDocumentLoader
+from openpyxl import load_workbook
+import multi_doc_loader
+"""
+
+# módulos que não deveriam ser carregados só para exibir a interface
+WATCHED_MODULES = (
+    "langchain_groq", "langchain_openai", "langchain_community.vectorstores",
+    "langchain_community.document_loaders", "openpyxl", "faiss", "multi_doc_loader",
+)
+
+PROBE = """
+import json, sys, time
+mode, previous = sys.argv[1], sys.argv[2] == "1"
+if mode == "render":
+    from streamlit.testing.v1 import AppTest
+else:
+    import streamlit
+start = time.perf_counter()
+if previous:
+    exec(sys.argv[3])
+if mode == "render":
+    at = AppTest.from_file("app.py", default_timeout=120)
+    at.run()
+    errors = [str(exception.message) for exception in at.exception]
+else:
+    import app
+    errors = []
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "loaded": [name for name in sys.argv[4].split(",") if name in sys.modules],
+    "errors": errors,
+}))
+"""
+
+
+def measure(mode: str, previous: bool, runs: int) -> Dict:
+    samples = []
+    result = {}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, mode, "1" if previous else "0", EAGER_IMPORTS, ",".join(WATCHED_MODULES)],
+            cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+    return {"median": statistics.median(samples), "min": min(samples), "loaded": result["loaded"], "errors": result["errors"]}
+
+
+def run(runs: int, modes: List[str]):
+    print(f"{'medida':>22} {'anterior (s)':>13} {'atual (s)':>10} {'ganho':>7}")
+    for mode in modes:
+        before = measure(mode, True, runs)
+        after = measure(mode, False, runs)
+        label = "import app" if mode == "import" else "primeira renderização"
+        gain = 1 - after["median"] / before["median"] if before["median"] else 0.0
+        print(f"{label:>22} {before['median']:>13.2f} {after['median']:>10.2f} {gain:>7.0%}")
+        print(f"{'':>22} módulos pesados carregados agora: {', '.join(after['loaded']) or 'nenhum'}")
+        for error in after["errors"]:
+            print(f"{'':>22} erro na renderização: {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="processos por medida; reporta a mediana")
+    parser.add_argument("--modes", nargs="+", default=["import", "render"], choices=("import", "render"))
+    args = parser.parse_args()
+    run(args.runs, args.modes)
@@ -0,0 +1,56 @@
+"""Mede a latência de recuperação por turno conforme o índice cresce.
+
+Compara o caminho antigo (FAISS.load_local a cada pergunta) com o
+VectorStoreManager, que mantém o índice carregado entre os turnos.
+
+    python -m benchmarks.bench_vector_store --sizes 1000 10000 50000
+"""
+from langchain_community.vectorstores import FAISS
+from benchmarks.fakes import HashEmbeddings, synthetic_texts
+from vector_store_manager import VectorStoreManager, bump_index_generation
+import argparse
+import statistics
+import tempfile
+import time
+import os
+
+
+def _time_turns(fn, turns: int) -> float:
+    samples = []
+    for i in range(turns):
+        start = time.perf_counter()
+        fn(f"pergunta {i}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(sizes, turns: int):
+    embeddings = HashEmbeddings()
+    print(f"{'vetores':>10} {'load_local/turno (ms)':>24} {'manager/turno (ms)':>20}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_path = os.path.join(tmp, "faiss_index_chatbot")
+            FAISS.from_texts(synthetic_texts(size, words_per_text=40), embeddings).save_local(index_path)
+            bump_index_generation(index_path)
+
+            def reload_every_turn(query):
+                store = FAISS.load_local(index_path, embeddings=embeddings, allow_dangerous_deserialization=True)
+                return store.similarity_search(query, k=3)
+
+            manager = VectorStoreManager(index_path, embeddings)
+            manager.get()
+
+            def cached(query):
+                return manager.get().similarity_search(query, k=3)
+
+            baseline = _time_turns(reload_every_turn, turns)
+            shared = _time_turns(cached, turns)
+            print(f"{size:>10} {baseline:>24.2f} {shared:>20.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.turns)
@@ -0,0 +1,146 @@
+"""Geração de corpora sintéticos em PDF, TXT, CSV e DOCX para os benchmarks.
+
+O tamanho é dado em chunks aproximados (com o chunk_size padrão de 256
+tokens), para que as escalas sejam comparáveis entre os formatos.
+"""
+from docx import Document as DocxDocument
+from typing import Dict, List, Sequence
+import csv
+import os
+import random
+
+FORMATS = ("pdf", "txt", "csv", "docx")
+
+# chunks por arquivo; arquivos maiores deixam o parsing em paralelo desbalanceado
+CHUNKS_PER_FILE = 50
+CHARS_PER_CHUNK = 800
+LINES_PER_PDF_PAGE = 45
+
+
+class TextGenerator:
+    """Parágrafos determinísticos com vocabulário fixo e identificadores (ex.: CT-2024-000123)."""
+
+    def __init__(self, seed: int = 0, vocabulary_size: int = 5000):
+        self.rng = random.Random(seed)
+        self.vocabulary = [f"termo{i}" for i in range(vocabulary_size)]
+        self.counter = 0
+
+    def sentence(self, words: int = 12) -> str:
+        self.counter += 1
+        body = " ".join(self.rng.choices(self.vocabulary, k=words))
+        return f"{body.capitalize()} referente ao contrato CT-2024-{self.counter:06d}."
+
+    def paragraph(self, chars: int) -> str:
+        sentences = []
+        length = 0
+        while length < chars:
+            sentence = self.sentence()
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return " ".join(sentences)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, lines: Sequence[str]):
+    """PDF mínimo com texto extraível (Helvetica, uma linha por string), sem dependências."""
+    pages = [lines[i:i + LINES_PER_PDF_PAGE] for i in range(0, len(lines), LINES_PER_PDF_PAGE)] or [[]]
+    font_id = 3
+    objects: Dict[int, bytes] = {font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+    next_id = 4
+    for page_lines in pages:
+        content = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines) + " ET"
+        stream = content.encode("latin-1", errors="replace")
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(page_id)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode("ascii")
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id])
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        output += b"%010d 00000 n \n" % offsets[object_id]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def _wrap(text: str, width: int = 100) -> List[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + len(word) + 1 > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def write_file(path: str, file_format: str, generator: TextGenerator, chunks: int):
+    paragraphs = [generator.paragraph(CHARS_PER_CHUNK) for _ in range(chunks)]
+    if file_format == "txt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(paragraphs))
+    elif file_format == "pdf":
+        write_pdf(path, [line for paragraph in paragraphs for line in _wrap(paragraph)])
+    elif file_format == "docx":
+        document = DocxDocument()
+        for paragraph in paragraphs:
+            document.add_paragraph(paragraph)
+        document.save(path)
+    elif file_format == "csv":
+        # cada linha tem ~200 caracteres; 4 linhas por chunk
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["codigo", "descricao", "valor"])
+            for i in range(chunks * 4):
+                writer.writerow([f"P-{generator.counter:06d}-{i}", generator.paragraph(160), generator.rng.randint(1, 100_000)])
+    else:
+        raise ValueError(f"Formato não suportado: {file_format}")
+
+
+def write_corpus(directory: str, target_chunks: int, formats: Sequence[str] = FORMATS, seed: int = 0) -> Dict[str, int]:
+    """Escreve arquivos alternando os formatos até atingir ~target_chunks; retorna arquivos por formato."""
+    os.makedirs(directory, exist_ok=True)
+    generator = TextGenerator(seed)
+    counts = {file_format: 0 for file_format in formats}
+    remaining = target_chunks
+    file_number = 0
+    while remaining > 0:
+        file_format = formats[file_number % len(formats)]
+        chunks = min(CHUNKS_PER_FILE, remaining)
+        write_file(os.path.join(directory, f"doc_{file_number:06d}.{file_format}"), file_format, generator, chunks)
+        counts[file_format] += 1
+        remaining -= chunks
+        file_number += 1
+    return counts
+
+
+def corpus_queries(count: int, target_chunks: int, seed: int = 1) -> List[str]:
+    """Perguntas em linguagem natural e buscas por código, misturadas."""
+    rng = random.Random(seed)
+    vocabulary = [f"termo{i}" for i in range(5000)]
+    queries = []
+    for i in range(count):
+        if i % 4 == 0:
+            queries.append(f"contrato CT-2024-{rng.randint(1, max(1, target_chunks * 4)):06d}")
+        else:
+            queries.append("o que diz o documento sobre " + " ".join(rng.choices(vocabulary, k=5)))
+    return queries
@@ -0,0 +1,38 @@
+from langchain_core.embeddings import Embeddings
+from typing import List
+import hashlib
+import math
+import random
+
+
+class HashEmbeddings(Embeddings):
+    """Embeddings determinísticos baseados em hash, sem acesso à rede."""
+
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimension)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        self.texts_embedded += 1
+        return self._embed(text)
+
+
+def synthetic_texts(count: int, words_per_text: int = 120, seed: int = 0) -> List[str]:
+    """Gera textos sintéticos com vocabulário fixo."""
+    rng = random.Random(seed)
+    vocabulary = [f"termo{i}" for i in range(5000)]
+    return [" ".join(rng.choices(vocabulary, k=words_per_text)) for _ in range(count)]
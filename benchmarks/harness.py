@@ -0,0 +1,268 @@
+"""Suíte de benchmarks de ingestão, busca e resposta, sem rede, com saída em JSON.
+
+Para cada escala gera um corpus sintético (PDF/TXT/CSV/DOCX), ingere com
+embeddings falsos e mede vazão de ingestão, tempo de construção do índice,
+tamanho em disco, latência das buscas (p50/p99), tempo até o primeiro token
+do ChatbotBackend contra o servidor local de LLM e pico de RSS. Cada escala
+roda em um subprocesso próprio, para que o pico de memória não se misture.
+
+    python -m benchmarks.harness --scales 1000 10000 --output resultados.json
+    python -m benchmarks.harness --scales 1000 10000 --baseline resultados.json --fail-on-regression
+"""
+from benchmarks.corpus import FORMATS, corpus_queries, write_corpus
+from benchmarks.fakes import HashEmbeddings
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# métrica -> True quando um valor maior é melhor
+METRICS: Dict[str, bool] = {
+    "ingest_s": False,
+    "ingest_chunks_per_s": True,
+    "index_build_s": False,
+    "disk_mb": False,
+    "query_p50_ms": False,
+    "query_p99_ms": False,
+    "hybrid_p50_ms": False,
+    "hybrid_p99_ms": False,
+    "response_first_token_p50_ms": False,
+    "response_first_token_p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def _percentiles(values: List[float], prefix: str) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    p99 = ordered[min(len(ordered) - 1, int(round(0.99 * (len(ordered) - 1))))]
+    return {f"{prefix}_p50_ms": statistics.median(ordered) * 1000, f"{prefix}_p99_ms": p99 * 1000}
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes no Linux, bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_response(collections_root: str, collection: str, embeddings: HashEmbeddings, queries: List[str]) -> List[float]:
+    """Tempo até o primeiro token de ChatbotBackend.aget_response, com o LLM servido localmente.
+
+    Usa o mesmo caminho de main(): o gerador assíncrono consumido no loop de fundo.
+    """
+    from benchmarks.stub_llm_server import start_server
+    from collection_registry import CollectionRegistry
+
+    server, base_url = start_server(connect_latency=0.0, first_token_latency=0.0, tokens_per_second=100_000, response_tokens=20)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    import app
+
+    # o app resolve coleções e embeddings por recursos compartilhados; aqui aponta para o corpus do benchmark
+    registry = CollectionRegistry(collections_root)
+    app.get_collection_registry = lambda: registry
+    app.get_query_embeddings = lambda *args: embeddings
+    config = app.ChatbotConfig(
+        base_model="gpt-4o-mini", temperature=0.0, embedding_model="hash", openai_api_key="stub", collections=[collection]
+    )
+    backend = app.ChatbotBackend(config)
+    loop = app.get_event_loop()
+    latencies = []
+    try:
+        for query in queries:
+            start = time.perf_counter()
+            stream = loop.iterate(backend.aget_response(query, []))
+            next(stream, None)
+            latencies.append(time.perf_counter() - start)
+            for _ in stream:
+                pass
+    finally:
+        server.shutdown()
+    return latencies
+
+
+def run_scale(scale: int, formats: List[str], workers: Optional[int], n_queries: int, dim: int, response: bool) -> dict:
+    from faiss_index_factory import build_index, reconstruct_all, resolve_index_type
+    from collection_registry import INDEX_DIR_NAME
+    from lexical_index import LEXICAL_INDEX_FILE, LexicalIndex, reciprocal_rank_fusion
+    from multi_doc_loader import MultiFileLoader
+    from segment_store import load_vector_store
+
+    result = {"scale": scale, "formats": ",".join(formats)}
+    with tempfile.TemporaryDirectory() as tmp:
+        # mesmo layout das coleções do app: documentos/<coleção>/faiss_index_chatbot
+        collections_root = os.path.join(tmp, "documentos")
+        corpus_dir = os.path.join(collections_root, "bench")
+        result["files"] = write_corpus(corpus_dir, scale, formats)
+        result["corpus_mb"] = _directory_size(corpus_dir) / 1e6
+        index_path = os.path.join(corpus_dir, INDEX_DIR_NAME)
+        embeddings = HashEmbeddings(dim)
+
+        loader = MultiFileLoader(
+            directory_path=corpus_dir,
+            glob_pattern="**/*.*",
+            faiss_index_path=index_path,
+            embedding_cache_path=None,
+            max_workers=workers,
+            embeddings=embeddings
+        )
+        start = time.perf_counter()
+        chunks = loader.load()
+        loader.wait_for_compaction()
+        result["ingest_s"] = time.perf_counter() - start
+        result["chunks"] = chunks
+        result["ingest_chunks_per_s"] = chunks / result["ingest_s"] if result["ingest_s"] else 0.0
+
+        # construção do índice do zero, com o tipo escolhido pela política automática
+        vectors = reconstruct_all(loader.faiss_db.index)
+        result["index_type"] = resolve_index_type("auto", len(vectors))
+        start = time.perf_counter()
+        build_index(vectors, result["index_type"], metric=loader.faiss_db.index.metric_type)
+        result["index_build_s"] = time.perf_counter() - start
+        del vectors, loader
+        result["disk_mb"] = _directory_size(index_path) / 1e6
+
+        # buscas como no app: leitor com mmap, embedding da pergunta fora da medida
+        store = load_vector_store(index_path, embeddings)
+        lexical_index = LexicalIndex(os.path.join(index_path, LEXICAL_INDEX_FILE))
+        queries = corpus_queries(n_queries, scale)
+        query_vectors = embeddings.embed_documents(queries)
+        vector_latencies, hybrid_latencies = [], []
+        for query, vector in zip(queries, query_vectors):
+            start = time.perf_counter()
+            store.similarity_search_by_vector(vector, k=3)
+            vector_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            vector_ids = [doc.id for doc in store.similarity_search_by_vector(vector, k=12)]
+            lexical_ids = [doc_id for doc_id, _ in lexical_index.search(query, k=12)]
+            reciprocal_rank_fusion([vector_ids, lexical_ids])
+            hybrid_latencies.append(time.perf_counter() - start)
+        result.update(_percentiles(vector_latencies, "query"))
+        result.update(_percentiles(hybrid_latencies, "hybrid"))
+        lexical_index.close()
+
+        if response:
+            result.update(_percentiles(measure_response(collections_root, "bench", embeddings, queries[:max(1, n_queries // 5)]), "response_first_token"))
+
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """Imprime a variação em relação ao baseline e retorna as métricas que pioraram além da tolerância."""
+    previous_runs = {(run["scale"], run["formats"]): run for run in baseline.get("results", [])}
+    regressions = []
+    print(f"\n{'escala':>8} {'métrica':<30} {'baseline':>12} {'atual':>12} {'variação':>9}")
+    for result in results:
+        previous = previous_runs.get((result["scale"], result["formats"]))
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or not previous.get(metric):
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric]
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            flag = "  <-- regressão" if worse else ""
+            print(f"{result['scale']:>8} {metric:<30} {previous[metric]:>12.2f} {result[metric]:>12.2f} {change:>+8.1%}{flag}")
+            if worse:
+                regressions.append(f"{result['scale']}:{metric}")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10_000], help="tamanhos do corpus, em chunks (ex.: 1000 10000 100000 1000000)")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--no-response", action="store_true", help="não mede o ChatbotBackend (dispensa o Streamlit)")
+    parser.add_argument("--output", default=None, help="arquivo JSON com os resultados")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="piora relativa tolerada antes de acusar regressão")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--worker-scale", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.worker_scale is not None:
+        result = run_scale(args.worker_scale, args.formats, args.workers, args.queries, args.dim, not args.no_response)
+        print(json.dumps(result))
+        return 0
+
+    results = []
+    for scale in args.scales:
+        command = [
+            sys.executable, "-m", "benchmarks.harness", "--worker-scale", str(scale),
+            "--formats", *args.formats, "--queries", str(args.queries), "--dim", str(args.dim),
+        ]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        if args.no_response:
+            command.append("--no-response")
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"Falha na escala {scale}:\n{process.stderr}", file=sys.stderr)
+            return 1
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(
+            f"{scale:>8} chunks: ingestão {result['ingest_chunks_per_s']:.0f} chunks/s, "
+            f"índice {result['index_build_s']:.2f}s, disco {result['disk_mb']:.1f} MB, "
+            f"busca p50/p99 {result['query_p50_ms']:.2f}/{result['query_p99_ms']:.2f} ms, "
+            f"RSS {result['peak_rss_mb']:.0f} MB"
+        )
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key != "worker_scale"},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} métricas pioraram além de {args.tolerance:.0%}: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Servidor local compatível com a API da OpenAI, para testes e benchmarks sem rede.
+
+Responde a /v1/models, /v1/embeddings e /v1/chat/completions (com e sem
+streaming), simulando latência de conexão, tempo até o primeiro token e
+vazão de geração. Para apontar o app para ele:
+
+    python -m benchmarks.stub_llm_server --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 streamlit run app.py
+"""
+from benchmarks.fakes import HashEmbeddings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+import argparse
+import json
+import threading
+import time
+import uuid
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # ajustados por start_server
+    connect_latency = 0.05
+    first_token_latency = 0.3
+    tokens_per_second = 80.0
+    response_tokens = 60
+    embeddings = HashEmbeddings(dimension=1536)
+
+    def setup(self):
+        super().setup()
+        # custo de uma conexão nova (DNS + TCP + TLS); conexões reaproveitadas não pagam
+        time.sleep(self.connect_latency)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model", "created": 0, "owned_by": "stub"}]})
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        request = self._read_json()
+        if self.path.endswith("/embeddings"):
+            self._embeddings(request)
+        elif self.path.endswith("/chat/completions"):
+            self._chat(request)
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def _embeddings(self, request: dict):
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        texts = [text if isinstance(text, str) else " ".join(map(str, text)) for text in inputs]
+        vectors = self.embeddings.embed_documents(texts)
+        self._send_json({
+            "object": "list",
+            "model": request.get("model", "stub"),
+            "data": [{"object": "embedding", "index": i, "embedding": vector} for i, vector in enumerate(vectors)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+    def _chat(self, request: dict):
+        model = request.get("model", "stub")
+        tokens = [f"token{i} " for i in range(self.response_tokens)]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        time.sleep(self.first_token_latency)
+
+        if not request.get("stream"):
+            time.sleep(len(tokens) / self.tokens_per_second)
+            self._send_json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = 1.0 / self.tokens_per_second
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(delay)
+            delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+            self._write_event(completion_id, model, delta, None)
+        self._write_event(completion_id, model, {}, "stop")
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, completion_id: str, model: str, delta: dict, finish_reason):
+        event = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+
+
+def start_server(
+        host: str = "127.0.0.1",
+        port: int = 0,
+        connect_latency: float = 0.05,
+        first_token_latency: float = 0.3,
+        tokens_per_second: float = 80.0,
+        response_tokens: int = 60
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Inicia o servidor em uma thread daemon e retorna (servidor, base_url)."""
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {
+        "connect_latency": connect_latency,
+        "first_token_latency": first_token_latency,
+        "tokens_per_second": tokens_per_second,
+        "response_tokens": response_tokens,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    args = parser.parse_args()
+    server, base_url = start_server(
+        args.host, args.port, args.connect_latency, args.first_token_latency, args.tokens_per_second, args.response_tokens
+    )
+    print(f"Servidor de testes em {base_url} (Ctrl+C para encerrar)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,209 @@
+from langchain_core.documents import Document
+from embedding_executor import estimate_tokens
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import multiprocessing
+import re
+
+# regras de fronteira, da mais forte para a mais fraca; as mais fracas só são usadas
+# quando uma unidade sozinha não cabe no chunk
+BOUNDARY_RULES: Dict[str, Sequence[str]] = {
+    "paragraph": (r"\n[ \t]*\n\s*", r"(?<=[.!?;:])\s+", r"\n", r"\s+"),
+    "sentence": (r"(?<=[.!?;:])\s+", r"\n", r"\s+"),
+    "row": (r"\n[ \t]*\n\s*", r"\n", r"\s+"),
+}
+
+
+class _ChunkAccumulator:
+    """Junta unidades em chunks de até chunk_size tokens, com sobreposição por unidades inteiras."""
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, min_chunk_size: int, length_fn: Callable[[str], int]):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_chunk_size = min_chunk_size
+        self.length_fn = length_fn
+        self.units: List[Tuple[str, int]] = []
+        self.tokens = 0
+        # tokens adicionados desde o último chunk (exclui a sobreposição)
+        self.fresh = 0
+        # o último chunk fica retido para absorver um resto pequeno no final
+        self.pending: Optional[str] = None
+        self.pending_tokens = 0
+
+    def add(self, units: Iterable[str]) -> Iterator[str]:
+        for unit in units:
+            tokens = self.length_fn(unit)
+            if self.tokens + tokens > self.chunk_size:
+                if self.fresh:
+                    yield from self._emit()
+                if self.tokens + tokens > self.chunk_size:
+                    # a sobreposição não cabe junto com a próxima unidade
+                    self.units, self.tokens = [], 0
+            self.units.append((unit, tokens))
+            self.tokens += tokens
+            self.fresh += tokens
+
+    def _emit(self) -> Iterator[str]:
+        text = "".join(unit for unit, _ in self.units)
+        tokens = self.tokens
+        kept: List[Tuple[str, int]] = []
+        kept_tokens = 0
+        for unit, unit_tokens in reversed(self.units):
+            if kept_tokens + unit_tokens > self.chunk_overlap:
+                break
+            kept.append((unit, unit_tokens))
+            kept_tokens += unit_tokens
+        self.units = kept[::-1]
+        self.tokens = kept_tokens
+        self.fresh = 0
+        if text.strip():
+            if self.pending is not None:
+                yield self.pending.strip()
+            self.pending, self.pending_tokens = text, tokens
+
+    def finish(self) -> Iterator[str]:
+        if self.fresh:
+            fresh_units = []
+            fresh_tokens = 0
+            for unit, unit_tokens in reversed(self.units):
+                if fresh_tokens >= self.fresh:
+                    break
+                fresh_units.append(unit)
+                fresh_tokens += unit_tokens
+            if (
+                self.pending is not None
+                and self.fresh < self.min_chunk_size
+                and self.pending_tokens + self.fresh <= self.chunk_size + self.min_chunk_size
+            ):
+                # resto pequeno demais para um chunk próprio: vai para o anterior
+                self.pending += "".join(reversed(fresh_units))
+            else:
+                yield from self._emit()
+        if self.pending is not None:
+            yield self.pending.strip()
+        self.pending = None
+
+
+class StreamingChunker:
+    """Divide texto em chunks de até `chunk_size` tokens respeitando fronteiras naturais.
+
+    O texto pode chegar em pedaços (blocos de um arquivo, páginas); só o trecho
+    após a última fronteira fica em memória. Unidades maiores que o chunk são
+    quebradas pelas regras mais fracas (frase, linha, palavra), e um resto menor
+    que `min_chunk_size` no fim do texto é incorporado ao chunk anterior.
+    """
+
+    def __init__(
+            self, chunk_size: int = 256,
+                 chunk_overlap: int = 32,
+                 boundary: str = "paragraph",
+                 min_chunk_size: Optional[int] = None,
+                 length_fn: Callable[[str], int] = estimate_tokens
+    ):
+        if boundary not in BOUNDARY_RULES:
+            raise ValueError(f"Regra de fronteira não suportada: {boundary}")
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap deve ser menor que chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.boundary = boundary
+        self.min_chunk_size = chunk_size // 4 if min_chunk_size is None else min_chunk_size
+        self.length_fn = length_fn
+        self.patterns = [re.compile(pattern) for pattern in BOUNDARY_RULES[boundary]]
+        # sem nenhuma fronteira forte, o buffer é cortado por uma regra mais fraca a partir deste tamanho
+        self.max_buffer_chars = chunk_size * 16
+
+    def with_boundary(self, boundary: str) -> "StreamingChunker":
+        if boundary == self.boundary:
+            return self
+        return StreamingChunker(self.chunk_size, self.chunk_overlap, boundary, self.min_chunk_size, self.length_fn)
+
+    def _units(self, text: str, level: int = 0) -> Iterator[str]:
+        """Quebra o texto pela regra `level`; só desce às regras mais fracas as unidades que não cabem no chunk."""
+        if level >= len(self.patterns):
+            # nenhuma fronteira disponível: corte por tamanho (~4 caracteres por token)
+            step = max(1, (self.chunk_size - 1) * 4)
+            for start in range(0, len(text), step):
+                yield text[start:start + step]
+            return
+        start = 0
+        for match in self.patterns[level].finditer(text):
+            if match.end() > start:
+                yield from self._fit(text[start:match.end()], level + 1)
+                start = match.end()
+        if start < len(text):
+            yield from self._fit(text[start:], level + 1)
+
+    def _fit(self, unit: str, level: int) -> Iterator[str]:
+        if self.length_fn(unit) <= self.chunk_size:
+            yield unit
+        else:
+            yield from self._units(unit, level)
+
+    def _last_boundary(self, buffer: str, search_from: int) -> int:
+        """Posição após a última fronteira do buffer (0 se ainda não há onde cortar)."""
+        for level, pattern in enumerate(self.patterns):
+            if level > 0 and len(buffer) < self.max_buffer_chars:
+                break
+            cut = 0
+            for match in pattern.finditer(buffer, search_from if level == 0 else 0):
+                # uma fronteira no fim do buffer ainda pode continuar no próximo pedaço
+                if match.end() < len(buffer):
+                    cut = match.end()
+            if cut:
+                return cut
+        return len(buffer) if len(buffer) >= self.max_buffer_chars else 0
+
+    def split_stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        accumulator = _ChunkAccumulator(self.chunk_size, self.chunk_overlap, self.min_chunk_size, self.length_fn)
+        buffer = ""
+        for piece in pieces:
+            # o buffer anterior não tinha fronteira forte; basta procurar perto da emenda
+            search_from = max(0, len(buffer) - 8)
+            buffer += piece
+            cut = self._last_boundary(buffer, search_from)
+            if cut:
+                yield from accumulator.add(self._units(buffer[:cut]))
+                buffer = buffer[cut:]
+        if buffer:
+            yield from accumulator.add(self._units(buffer))
+        yield from accumulator.finish()
+
+    def split_text(self, text: str) -> List[str]:
+        return list(self.split_stream([text]))
+
+    def _split_batch(self, documents: List[Document]) -> List[Document]:
+        return [
+            Document(page_content=text, metadata=dict(document.metadata))
+            for document in documents
+            for text in self.split_stream([document.page_content])
+        ]
+
+    def split_documents(self, documents: Iterable[Document], max_workers: int = 1, batch_size: int = 64) -> Iterator[Document]:
+        """Divide cada documento mantendo seus metadados; com max_workers > 1, em paralelo entre documentos."""
+        if max_workers <= 1:
+            for document in documents:
+                yield from self._split_batch([document])
+            return
+
+        def batches() -> Iterator[List[Document]]:
+            batch = []
+            for document in documents:
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        # spawn, como na ingestão: sem herdar threads e locks do processo que chama
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # no máximo 2 lotes por worker em andamento; a saída mantém a ordem de entrada
+            pending = deque()
+            for batch in batches():
+                pending.append(pool.submit(self._split_batch, batch))
+                if len(pending) >= max_workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
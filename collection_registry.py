@@ -0,0 +1,226 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from vector_store_manager import VectorStoreManager, read_index_generation
+from lexical_index import LEXICAL_INDEX_FILE, LexicalIndex, reciprocal_rank_fusion
+from ingestion_manifest import MANIFEST_FILE, IngestionManifest
+from reset_docs import DirectoryManager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import re
+import threading
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+COLLECTIONS_ROOT = "documentos"
+DEFAULT_COLLECTION = "geral"
+INDEX_DIR_NAME = "faiss_index_chatbot"
+
+_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+# arquivos que ficam em disco na consulta (SQLite) ou são só metadados
+_ON_DISK_SUFFIXES = (".sqlite", ".sqlite-wal", ".sqlite-shm", ".json", ".tmp")
+
+
+def validate_collection_name(name: str) -> str:
+    """Nomes viram diretórios: minúsculas, dígitos, '-' e '_', até 64 caracteres."""
+    if not _NAME_PATTERN.match(name or ""):
+        raise ValueError(f"Nome de coleção inválido: '{name}'. Use letras minúsculas, números, '-' ou '_'.")
+    return name
+
+
+def estimate_index_bytes(index_path: str) -> int:
+    """Memória aproximada do índice carregado: segmentos, ids e logs (docstore e BM25 ficam em disco)."""
+    total = 0
+    for root, _, files in os.walk(index_path):
+        for file_name in files:
+            if not file_name.endswith(_ON_DISK_SUFFIXES):
+                try:
+                    total += os.path.getsize(os.path.join(root, file_name))
+                except FileNotFoundError:
+                    # compactação removendo segmentos antigos
+                    pass
+    return total
+
+
+@dataclass
+class LoadedCollection:
+    """Coleção com índice em memória; `store` é a versão vista no último acesso."""
+    name: str
+    manager: VectorStoreManager
+    lexical_index: LexicalIndex
+    store: Optional["FAISS"] = None
+    generation: Optional[str] = None
+    memory_bytes: int = 0
+
+
+class CollectionRegistry:
+    """Coleções nomeadas (por usuário ou projeto), cada uma com documentos, índice e manifesto próprios.
+
+    Layout: `<root>/<coleção>/` guarda os arquivos enviados e
+    `<root>/<coleção>/faiss_index_chatbot/` o índice. Só as coleções
+    consultadas são carregadas; quando a soma estimada passa de
+    `memory_budget_bytes`, as menos usadas recentemente saem da memória.
+    """
+
+    def __init__(self, root: str = COLLECTIONS_ROOT, memory_budget_bytes: int = 2 << 30, max_search_workers: int = 8):
+        self.root = root
+        self.memory_budget_bytes = memory_budget_bytes
+        self._loaded: "OrderedDict[str, LoadedCollection]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._search_pool = ThreadPoolExecutor(max_workers=max_search_workers, thread_name_prefix="collection-search")
+        self.evictions = 0
+        migrate_legacy_layout(root)
+
+    def documents_dir(self, name: str) -> str:
+        return os.path.join(self.root, validate_collection_name(name))
+
+    def index_path(self, name: str) -> str:
+        return os.path.join(self.documents_dir(name), INDEX_DIR_NAME)
+
+    def list_collections(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            entry.name for entry in os.scandir(self.root)
+            if entry.is_dir() and _NAME_PATTERN.match(entry.name)
+        )
+
+    def create(self, name: str) -> str:
+        path = self.documents_dir(name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def memory_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: entry.memory_bytes for name, entry in self._loaded.items()}
+
+    def acquire(self, names: Iterable[str], embeddings: Embeddings) -> List[LoadedCollection]:
+        """Carrega (se preciso) e retorna as coleções pedidas que já têm índice, marcando-as como usadas.
+
+        `embeddings` só é usado na primeira carga de cada coleção; as buscas
+        recebem o vetor da pergunta já calculado.
+        """
+        names = list(dict.fromkeys(names))
+        entries = []
+        with self._lock:
+            for name in names:
+                entry = self._loaded.get(name)
+                if entry is None:
+                    index_path = self.index_path(name)
+                    if read_index_generation(index_path) is None:
+                        continue
+                    entry = LoadedCollection(
+                        name=name,
+                        manager=VectorStoreManager(index_path, embeddings),
+                        lexical_index=LexicalIndex(os.path.join(index_path, LEXICAL_INDEX_FILE))
+                    )
+                    self._loaded[name] = entry
+                self._loaded.move_to_end(name)
+                entries.append(entry)
+
+        # a carga acontece fora do lock: cada VectorStoreManager serializa a sua
+        for entry in entries:
+            entry.store = entry.manager.get()
+            if entry.manager.generation != entry.generation:
+                entry.generation = entry.manager.generation
+                entry.memory_bytes = estimate_index_bytes(entry.manager.index_path)
+
+        with self._lock:
+            self._evict(keep=set(names))
+        return [entry for entry in entries if entry.store is not None]
+
+    def _evict(self, keep: set):
+        total = sum(entry.memory_bytes for entry in self._loaded.values())
+        for name in list(self._loaded):
+            if total <= self.memory_budget_bytes:
+                break
+            if name in keep:
+                continue
+            # buscas em andamento mantêm suas referências; a memória é liberada ao terminarem
+            total -= self._loaded.pop(name).memory_bytes
+            self.evictions += 1
+
+    def evict(self, name: str):
+        with self._lock:
+            self._loaded.pop(name, None)
+
+    def erase(self, name: str):
+        """Remove documentos e índice de uma única coleção."""
+        self.evict(name)
+        DirectoryManager(self.documents_dir(name)).dir_erase()
+
+    def _map(self, fn, collections: Sequence[LoadedCollection]) -> list:
+        if len(collections) == 1:
+            return [fn(collections[0])]
+        return list(self._search_pool.map(fn, collections))
+
+    def search(self, collections: Sequence[LoadedCollection], embedding: List[float], k: int) -> List[Document]:
+        """Top-k de cada coleção, mesclado pela distância (o FAISS libera o GIL durante a busca)."""
+        import faiss
+
+        def search_one(collection: LoadedCollection) -> List[Tuple[float, str, Document]]:
+            store = collection.store
+            higher_is_better = store.index.metric_type == faiss.METRIC_INNER_PRODUCT
+            # embeddings normalizados: ||a - b||² = 2 - 2·<a, b>, a mesma escala da distância L2 do FAISS
+            return [
+                (2 - 2 * score if higher_is_better else score, collection.name, doc)
+                for doc, score in store.similarity_search_with_score_by_vector(embedding, k=k)
+            ]
+
+        hits = [hit for part in self._map(search_one, collections) for hit in part]
+        hits.sort(key=lambda hit: hit[0])
+        return [_tag(doc, name) for _, name, doc in hits[:k]]
+
+    def lexical_search(self, collections: Sequence[LoadedCollection], query: str, k: int, min_score_ratio: float = 0.0) -> List[str]:
+        """Ids do BM25; entre coleções as pontuações não são comparáveis, então a mescla é por posição (RRF)."""
+        rankings = self._map(
+            lambda collection: [doc_id for doc_id, _ in collection.lexical_index.search(query, k=k, min_score_ratio=min_score_ratio)],
+            collections
+        )
+        if len(rankings) == 1:
+            return rankings[0]
+        return reciprocal_rank_fusion(rankings)[:k]
+
+    @staticmethod
+    def fetch(collections: Sequence[LoadedCollection], ids: List[str]) -> Optional[List[Document]]:
+        """Busca os ids nos docstores das coleções; None se algum não existir mais."""
+        docs = []
+        for doc_id in ids:
+            for collection in collections:
+                doc = collection.store.docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    docs.append(_tag(doc, collection.name))
+                    break
+            else:
+                return None
+        return docs
+
+
+def _tag(doc: Document, collection: str) -> Document:
+    # cópia: o docstore em memória (índices antigos) devolve a própria instância
+    return Document(page_content=doc.page_content, metadata={**doc.metadata, "collection": collection}, id=doc.id)
+
+
+def migrate_legacy_layout(root: str = COLLECTIONS_ROOT, collection: str = DEFAULT_COLLECTION):
+    """Move o índice único antigo (`<root>/faiss_index_chatbot`) e seus documentos para a coleção padrão."""
+    legacy_index = os.path.join(root, INDEX_DIR_NAME)
+    target = os.path.join(root, collection)
+    if not os.path.isdir(legacy_index) or os.path.exists(target):
+        return
+    entries = os.listdir(root)
+    os.makedirs(target)
+    for entry in entries:
+        os.replace(os.path.join(root, entry), os.path.join(target, entry))
+    print(f"Índice em '{legacy_index}' movido para a coleção '{collection}'.")
+
+    # o manifesto guarda os caminhos dos arquivos; sem reescrevê-los tudo seria reprocessado
+    index_path = os.path.join(target, INDEX_DIR_NAME)
+    if not os.path.exists(os.path.join(index_path, MANIFEST_FILE)):
+        return
+    manifest = IngestionManifest(index_path)
+    manifest.rename_prefix(os.path.normpath(root) + os.sep, os.path.normpath(target) + os.sep)
+    manifest.save()
+    manifest.close()
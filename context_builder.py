@@ -0,0 +1,128 @@
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage
+from embedding_executor import estimate_tokens
+from typing import Callable, Dict, List, Optional
+
+# orçamento de tokens do prompt (contexto + histórico) por modelo
+MODEL_PROMPT_BUDGETS: Dict[str, int] = {
+    "llama-3.1-70b-versatile": 6000,
+    "llama-3.1-8b-instant": 6000,
+    "gpt-4o": 12000,
+    "gpt-4o-mini": 12000,
+}
+DEFAULT_PROMPT_BUDGET = 4000
+
+
+def _overlap(previous: str, text: str, min_overlap: int = 30, max_overlap: int = 400) -> int:
+    """Tamanho do trecho final de `previous` repetido no início de `text`."""
+    tail = previous[-max_overlap:]
+    probe = text[:min_overlap]
+    start = tail.find(probe)
+    while start != -1:
+        candidate = tail[start:]
+        if text.startswith(candidate):
+            return len(candidate)
+        start = tail.find(probe, start + 1)
+    return 0
+
+
+def dedupe_chunks(texts: List[str]) -> List[str]:
+    """Remove trechos repetidos e a sobreposição entre chunks vizinhos do splitter."""
+    kept: List[str] = []
+    for text in texts:
+        text = text.strip()
+        if not text or any(text in other for other in kept):
+            continue
+        for other in kept:
+            overlap = _overlap(other, text)
+            if overlap:
+                text = text[overlap:].lstrip()
+                break
+        if text:
+            kept.append(text)
+    return kept
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    return text[:max(0, tokens * 4)]
+
+
+def extractive_summary(previous: str, messages: List[BaseMessage], max_chars_per_turn: int = 200) -> str:
+    """Resumo incremental sem chamada ao modelo: a primeira frase de cada turno antigo."""
+    lines = [previous] if previous else []
+    for message in messages:
+        role = "Ada" if isinstance(message, AIMessage) else "Usuário"
+        first_sentence = message.content.strip().split(". ")[0]
+        lines.append(f"{role}: {first_sentence[:max_chars_per_turn]}")
+    return "\n".join(lines)
+
+
+class ContextBuilder:
+    """Monta contexto e histórico do prompt dentro de um orçamento de tokens por modelo.
+
+    Turnos que saem da janela são resumidos de forma incremental: o resumo
+    acumulado fica guardado na instância e só os turnos novos são processados.
+    """
+
+    def __init__(
+            self, model: str,
+                 budget: Optional[int] = None,
+                 context_share: float = 0.5,
+                 summary_share: float = 0.15,
+                 summarize_fn: Optional[Callable[[str, List[BaseMessage]], str]] = None
+    ):
+        self.model = model
+        self.budget = budget or MODEL_PROMPT_BUDGETS.get(model, DEFAULT_PROMPT_BUDGET)
+        self.context_budget = int(self.budget * context_share)
+        self.summary_budget = int(self.budget * summary_share)
+        self.history_budget = self.budget - self.context_budget - self.summary_budget
+        self.summarize_fn = summarize_fn or extractive_summary
+        self.summary = ""
+        self.summarized_upto = 0
+
+    def build_context(self, docs: List[Document]) -> str:
+        parts = []
+        used = 0
+        for text in dedupe_chunks([doc.page_content for doc in docs]):
+            tokens = estimate_tokens(text)
+            if used + tokens > self.context_budget:
+                remaining = self.context_budget - used
+                if remaining > 50:
+                    parts.append(_truncate_to_tokens(text, remaining))
+                break
+            parts.append(text)
+            used += tokens
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def _format_message(message: BaseMessage) -> str:
+        role = "Ada" if isinstance(message, AIMessage) else "Usuário"
+        return f"{role}: {message.content}"
+
+    def build_history(self, chat_history: List[BaseMessage]) -> str:
+        if len(chat_history) < self.summarized_upto:
+            # a conversa foi apagada, o resumo anterior não vale mais
+            self.summary, self.summarized_upto = "", 0
+
+        # janela com os turnos mais recentes que cabem no orçamento
+        window_start = len(chat_history)
+        used = 0
+        while window_start > self.summarized_upto:
+            tokens = estimate_tokens(self._format_message(chat_history[window_start - 1]))
+            if used + tokens > self.history_budget:
+                break
+            used += tokens
+            window_start -= 1
+
+        if window_start > self.summarized_upto:
+            self.summary = self.summarize_fn(self.summary, chat_history[self.summarized_upto:window_start])
+            self.summarized_upto = window_start
+            if estimate_tokens(self.summary) > self.summary_budget:
+                # mantém as linhas mais recentes do resumo
+                self.summary = self.summary[-self.summary_budget * 4:].split("\n", 1)[-1]
+
+        lines = []
+        if self.summary:
+            lines.append(f"Resumo da conversa anterior:\n{self.summary}")
+        lines.extend(self._format_message(message) for message in chat_history[window_start:])
+        return "\n".join(lines)
@@ -0,0 +1,131 @@
+from langchain_core.embeddings import Embeddings
+from typing import Dict, List, Optional, Set
+from array import array
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class EmbeddingCache:
+    """Cache persistente de embeddings em SQLite, endereçado por (modelo, hash do texto)."""
+
+    def __init__(self, path: str, max_entries: int = 500_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model_name}:{digest}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        now = time.time()
+        with self._lock:
+            # consulta em blocos para respeitar o limite de parâmetros do SQLite
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows]
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def contains_many(self, keys: List[str]) -> Set[str]:
+        """Chaves presentes no cache, sem atualizar o acesso nem os contadores."""
+        found = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(f"SELECT key FROM embeddings WHERE key IN ({placeholders})", batch)
+                found.update(key for (key,) in rows)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            # remove as entradas menos usadas recentemente (LRU)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Envolve um modelo de embeddings, consultando o cache antes de chamar o provedor."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: Optional[str] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update(computed)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
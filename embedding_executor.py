@@ -0,0 +1,131 @@
+from langchain_core.embeddings import Embeddings
+from llm_pool import shared_event_loop
+from typing import Dict, List, Optional
+import asyncio
+import random
+import time
+
+
+def estimate_tokens(text: str) -> int:
+    # aproximação de ~4 caracteres por token, suficiente para o controle de cota
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Limita a taxa de consumo de uma cota por minuto (requisições ou tokens)."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        # verificação e débito sem await entre eles, logo atômicos dentro do loop
+        self._refill()
+        while self.tokens < amount:
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= amount
+
+
+class LangChainEmbeddingBackend:
+    """Backend que delega para qualquer modelo de embeddings do LangChain (OpenAI, fakes locais, etc.)."""
+
+    RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def is_retryable(self, error: Exception) -> bool:
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            return status in self.RETRYABLE_STATUS
+        name = type(error).__name__
+        return any(marker in name for marker in ("RateLimit", "Timeout", "Connection"))
+
+
+class EmbeddingExecutor(Embeddings):
+    """Executa embeddings em lotes concorrentes, respeitando limites de cota do provedor."""
+
+    def __init__(
+            self, backend,
+                 batch_size: int = 64,
+                 max_concurrency: int = 4,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 max_retries: int = 6,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0
+    ):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.retries = 0
+        # buckets mantidos entre chamadas, para que a cota valha para toda a ingestão
+        self.limits: Dict[str, TokenBucket] = {}
+        if requests_per_minute:
+            self.limits["requests"] = TokenBucket(requests_per_minute)
+        if tokens_per_minute:
+            self.limits["tokens"] = TokenBucket(tokens_per_minute)
+
+    @property
+    def model(self) -> Optional[str]:
+        return getattr(getattr(self.backend, "embeddings", None), "model", None)
+
+    async def _embed_batch(self, texts: List[str], semaphore: asyncio.Semaphore) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        attempt = 0
+        while True:
+            async with semaphore:
+                if "requests" in self.limits:
+                    await self.limits["requests"].acquire(1)
+                if "tokens" in self.limits:
+                    await self.limits["tokens"].acquire(tokens)
+                try:
+                    self.requests += 1
+                    return await self.backend.aembed(texts)
+                except Exception as e:
+                    retryable = getattr(self.backend, "is_retryable", lambda error: True)(e)
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+            # backoff exponencial com jitter, fora do semáforo para liberar a vaga
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(self._embed_batch(batch, semaphore) for batch in batches))
+        # gather preserva a ordem dos lotes
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # sempre no mesmo loop: o cliente assíncrono do provedor fica preso ao loop da primeira chamada
+        return shared_event_loop().run(self.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,158 @@
+from typing import Optional, Sequence
+import math
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("auto", "flat", "ivf", "hnsw", "sq8", "ivfpq")
+
+# política automática: (limite de vetores, tipo de índice)
+AUTO_POLICY = (
+    (50_000, "flat"),
+    (500_000, "ivf"),
+    (5_000_000, "sq8"),
+)
+AUTO_FALLBACK = "ivfpq"
+
+# vetores mínimos para treinar cada tipo de índice com qualidade aceitável
+MIN_TRAINING_VECTORS = {"ivf": 4_000, "sq8": 4_000, "ivfpq": 20_000}
+
+
+def choose_index_type(n_vectors: int) -> str:
+    for limit, index_type in AUTO_POLICY:
+        if n_vectors < limit:
+            return index_type
+    return AUTO_FALLBACK
+
+
+def resolve_index_type(index_type: str, n_vectors: int) -> str:
+    """Resolve 'auto' pela política e recai para flat quando não há vetores para treino."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Tipo de índice não suportado: {index_type}. Opções: {', '.join(INDEX_TYPES)}")
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+    if n_vectors < MIN_TRAINING_VECTORS.get(index_type, 0):
+        return "flat"
+    return index_type
+
+
+def _nlist(n_vectors: int) -> int:
+    return max(1, min(65_536, int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # ~16 dimensões por subquantizador, precisando dividir a dimensão
+    for m in range(max(1, dim // 16), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def factory_string(index_type: str, dim: int, n_vectors: int) -> str:
+    nlist = _nlist(n_vectors)
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf":
+        return f"IVF{nlist},Flat"
+    if index_type == "hnsw":
+        return "HNSW32"
+    if index_type == "sq8":
+        return f"IVF{nlist},SQ8"
+    if index_type == "ivfpq":
+        return f"IVF{nlist},PQ{_pq_subquantizers(dim)}"
+    raise ValueError(f"Tipo de índice não suportado: {index_type}")
+
+
+def index_type_of(index: faiss.Index) -> str:
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVFScalarQuantizer):
+        return "sq8"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """Parâmetros de busca com um seletor, mantendo o nprobe/efSearch já configurados no índice."""
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=downcast.nprobe)
+    if isinstance(downcast, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=downcast.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def remove_labels(index: faiss.Index, labels: Sequence[int], nprobe: int = 16) -> faiss.Index:
+    """Índice sem os rótulos dados, com os demais renumerados para 0..n-1 na mesma ordem.
+
+    Usado na compactação. Nos IVF os códigos ficam onde estão: só os rótulos
+    das listas invertidas são reescritos, sem retreinar nem recodificar. O
+    HNSW não aceita remoções e é refeito com os vetores restantes.
+    """
+    labels = np.asarray(labels, dtype="int64")
+    keep = np.setdiff1d(np.arange(index.ntotal, dtype="int64"), labels)
+    index_type = index_type_of(index)
+    if index_type == "hnsw":
+        return build_index(reconstruct_all(index)[keep], index_type, metric=index.metric_type, nprobe=nprobe)
+    if index_type == "flat":
+        # o flat já desloca as posições seguintes na remoção
+        index.remove_ids(faiss.IDSelectorBatch(labels))
+        return index
+    ivf = faiss.extract_index_ivf(index)
+    ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    remap = np.full(index.ntotal, -1, dtype="int64")
+    remap[keep] = np.arange(len(keep), dtype="int64")
+    index.remove_ids(faiss.IDSelectorBatch(labels))
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if size == 0:
+            continue
+        ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy()
+        codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * invlists.code_size).copy()
+        invlists.update_entries(list_no, 0, size, faiss.swig_ptr(remap[ids]), faiss.swig_ptr(codes))
+    return index
+
+
+def configure_search(index: faiss.Index, nprobe: int = 16, ef_search: int = 64):
+    """Ajusta os parâmetros de busca, trocando recall por latência."""
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, faiss.IndexIVF):
+        downcast.nprobe = min(nprobe, downcast.nlist)
+    elif isinstance(downcast, faiss.IndexHNSW):
+        downcast.hnsw.efSearch = ef_search
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """Recupera os vetores do índice, na ordem de inserção (aproximados em índices quantizados)."""
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, faiss.IndexIVF):
+        downcast.make_direct_map()
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype="float32")
+    return downcast.reconstruct_n(0, index.ntotal)
+
+
+def build_index(
+        vectors: np.ndarray,
+        index_type: str,
+        metric: int = faiss.METRIC_L2,
+        nprobe: int = 16,
+        training_sample: int = 100_000,
+        seed: Optional[int] = 0
+) -> faiss.Index:
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n_vectors, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(index_type, dim, n_vectors), metric)
+    if not index.is_trained:
+        # o treino usa apenas uma amostra, o custo não cresce com o corpus
+        rng = np.random.default_rng(seed)
+        sample_size = min(n_vectors, max(training_sample, 39 * _nlist(n_vectors)))
+        sample = vectors[rng.choice(n_vectors, size=sample_size, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    configure_search(index, nprobe=nprobe)
+    return index
@@ -0,0 +1,160 @@
+"""Ingestão de documentos pela linha de comando, sem o Streamlit.
+
+Processa os arquivos novos ou alterados de uma coleção e atualiza o índice
+usado pelo app. Uma execução interrompida (Ctrl+C, queda da máquina) é
+retomada na próxima, a partir dos arquivos já concluídos.
+
+    python ingest.py --collection juridico --workers 8
+    python ingest.py --collection juridico --dry-run
+    python ingest.py /mnt/contratos --collection juridico   # documentos fora da pasta da coleção
+"""
+from collection_registry import COLLECTIONS_ROOT, DEFAULT_COLLECTION, INDEX_DIR_NAME, migrate_legacy_layout, validate_collection_name
+from multi_doc_loader import IngestionLockedError, IngestionProgress, MultiFileLoader, estimate_ingestion
+import argparse
+import os
+import sys
+import time
+
+
+class ProgressPrinter:
+    """Mostra o progresso em uma única linha no terminal, ou uma linha por etapa em logs."""
+
+    def __init__(self, stream=sys.stderr, min_interval: float = 0.5):
+        self.stream = stream
+        self.min_interval = min_interval
+        self.interactive = stream.isatty()
+        self.started_at = time.monotonic()
+        self._last_print = 0.0
+        self._last_stage = None
+
+    def __call__(self, progress: IngestionProgress):
+        now = time.monotonic()
+        stage_changed = progress.stage != self._last_stage
+        if not stage_changed and now - self._last_print < self.min_interval:
+            return
+        if not self.interactive and not stage_changed and now - self._last_print < 10:
+            return
+        self._last_print = now
+        self._last_stage = progress.stage
+        elapsed = now - self.started_at
+        rate = progress.chunks_embedded / elapsed if elapsed > 0 else 0.0
+        line = (
+            f"[{progress.stage}] arquivos {progress.files_done}/{progress.files_total} | "
+            f"chunks {progress.chunks_embedded}/{progress.chunks} | {rate:.0f} chunks/s | {elapsed:.0f}s"
+        )
+        if self.interactive:
+            self.stream.write(f"\r{line:<100}")
+            if progress.stage == "done":
+                self.stream.write("\n")
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", default=None, help="diretório com os documentos (padrão: o da coleção)")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION, help="coleção que recebe os documentos")
+    parser.add_argument("--glob", default="**/*.*", help="padrão dos arquivos dentro do diretório")
+    parser.add_argument("--index-path", default=None, help="diretório do índice FAISS (padrão: o da coleção)")
+    parser.add_argument("--workers", type=int, default=None, help="processos de parsing (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="tamanho máximo do chunk, em tokens")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="sobreposição entre chunks, em tokens")
+    parser.add_argument("--boundary", default="paragraph", choices=("paragraph", "sentence", "row"), help="fronteira preferida dos chunks")
+    parser.add_argument("--model", default="text-embedding-3-small", help="modelo de embeddings da OpenAI")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="chave da OpenAI (padrão: OPENAI_API_KEY)")
+    parser.add_argument("--index-type", default="auto", help="tipo do índice FAISS (auto, flat, ivf, hnsw, sq8, ivfpq)")
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    parser.add_argument("--tokens-per-minute", type=int, default=None)
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0, help="segundos entre checkpoints do manifesto")
+    parser.add_argument("--lock-timeout", type=float, default=0.0, help="segundos de espera se outra ingestão usa o índice (padrão: falha na hora)")
+    parser.add_argument("--dry-run", action="store_true", help="apenas estima tamanho e custo, sem gerar embeddings")
+    parser.add_argument("--quiet", action="store_true", help="não mostra o progresso")
+    args = parser.parse_args(argv)
+    try:
+        validate_collection_name(args.collection)
+    except ValueError as e:
+        parser.error(str(e))
+    collection_dir = os.path.join(COLLECTIONS_ROOT, args.collection)
+    if args.index_path is None:
+        migrate_legacy_layout()
+    args.directory = args.directory or collection_dir
+    args.index_path = args.index_path or os.path.join(collection_dir, INDEX_DIR_NAME)
+    return args
+
+
+def dry_run(args: argparse.Namespace) -> int:
+    estimate = estimate_ingestion(
+        args.directory,
+        args.index_path,
+        glob_pattern=args.glob,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        boundary=args.boundary,
+        model_name=args.model,
+        max_workers=args.workers
+    )
+    print(f"Arquivos novos ou alterados: {estimate.files} ({_format_bytes(estimate.bytes)})")
+    print(f"Arquivos removidos: {estimate.removed_files}")
+    print(f"Chunks: {estimate.chunks} ({estimate.cached_chunks} já no cache de embeddings)")
+    print(f"Tokens estimados: {estimate.tokens}")
+    if estimate.estimated_cost is None:
+        print(f"Custo estimado: preço desconhecido para o modelo '{args.model}'")
+    else:
+        print(f"Custo estimado dos embeddings: US$ {estimate.estimated_cost:.4f}")
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not os.path.isdir(args.directory):
+        print(f"Diretório não encontrado: {args.directory}", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        return dry_run(args)
+    if not args.api_key:
+        print("Informe a chave da OpenAI com --api-key ou OPENAI_API_KEY.", file=sys.stderr)
+        return 1
+
+    loader = MultiFileLoader(
+        directory_path=args.directory,
+        glob_pattern=args.glob,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        boundary=args.boundary,
+        api_key=args.api_key,
+        model_name=args.model,
+        faiss_index_path=args.index_path,
+        max_workers=args.workers,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        index_type=args.index_type,
+        progress_callback=None if args.quiet else ProgressPrinter(),
+        checkpoint_interval=args.checkpoint_interval,
+        lock_timeout=args.lock_timeout
+    )
+    try:
+        total_chunks = loader.load()
+        loader.wait_for_compaction()
+    except IngestionLockedError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\nInterrompido. O progresso foi salvo; execute novamente para continuar.", file=sys.stderr)
+        return 130
+    cache_stats = loader.cache_stats()
+    print(f"Novos trechos indexados: {total_chunks}")
+    print(f"Cache de embeddings: {cache_stats['hits']} acertos, {cache_stats['misses']} chamadas ao provedor.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+import threading
+import time
+import uuid
+
+if TYPE_CHECKING:
+    from multi_doc_loader import IngestionProgress, MultiFileLoader
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _new_progress() -> "IngestionProgress":
+    # o loader (parsers, FAISS) só é importado quando o primeiro job é submetido
+    from multi_doc_loader import IngestionProgress
+    return IngestionProgress()
+
+
+@dataclass
+class IngestionJob:
+    """Estado de uma ingestão submetida à fila."""
+    id: str
+    description: str
+    status: str = QUEUED
+    progress: "IngestionProgress" = field(default_factory=_new_progress)
+    total_chunks: Optional[int] = None
+    cache_stats: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+class IngestionJobQueue:
+    """Executa ingestões em uma thread de fundo, uma por vez, fora da thread do Streamlit.
+
+    As ingestões são serializadas, mesmo em coleções diferentes, porque
+    disputam a mesma CPU e a mesma cota de embeddings; a interface apenas
+    submete e consulta o estado dos jobs.
+    """
+
+    def __init__(self, max_history: int = 20):
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion")
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, loader_factory: Callable[..., "MultiFileLoader"], description: str = "") -> str:
+        """Agenda uma ingestão; `loader_factory(progress_callback=...)` cria o loader dentro do job."""
+        job = IngestionJob(id=uuid.uuid4().hex, description=description)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+        self._executor.submit(self._run, job, loader_factory)
+        return job.id
+
+    def _run(self, job: IngestionJob, loader_factory: Callable[..., "MultiFileLoader"]):
+        job.status = RUNNING
+
+        def on_progress(progress: "IngestionProgress"):
+            # cópia: a interface lê o estado enquanto o loader o atualiza
+            job.progress = replace(progress)
+
+        try:
+            loader = loader_factory(progress_callback=on_progress)
+            job.total_chunks = loader.load()
+            loader.wait_for_compaction()
+            job.cache_stats = loader.cache_stats()
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _trim_history(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.created_at)[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestionJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def active(self) -> List[IngestionJob]:
+        return [job for job in self.jobs() if not job.finished]
@@ -0,0 +1,132 @@
+from typing import List, Set, Tuple
+import hashlib
+import os
+import sqlite3
+import threading
+
+MANIFEST_FILE = "manifest.sqlite"
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """Registra, por arquivo ingerido, seu tamanho, mtime, hash e os ids dos vetores gerados.
+
+    Cada arquivo é uma linha em SQLite: as alterações ficam na transação
+    aberta e `save()` faz o checkpoint com um commit proporcional só aos
+    arquivos alterados desde o anterior. Uma queda antes dele descarta a
+    transação, como se as alterações não tivessem acontecido.
+
+    `in_progress` fica gravado enquanto uma ingestão roda; se ainda estiver
+    marcado na carga, a execução anterior foi interrompida e o índice pode ter
+    vetores de arquivos que não chegaram ao manifesto.
+    """
+
+    def __init__(self, index_path: str):
+        self.path = os.path.join(index_path, MANIFEST_FILE)
+        os.makedirs(index_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime INTEGER NOT NULL,"
+            " sha256 TEXT NOT NULL, ids TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT value FROM state WHERE key = 'in_progress'").fetchone()
+        self.in_progress = bool(row and row[0])
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normpath(file_path)
+
+    def diff(self, file_paths: List[str]) -> Tuple[List[str], List[str]]:
+        """Retorna (arquivos novos ou alterados, arquivos removidos) em relação ao manifesto."""
+        with self._lock:
+            entries = {
+                path: (size, mtime, sha256)
+                for path, size, mtime, sha256 in self._conn.execute("SELECT path, size, mtime, sha256 FROM files")
+            }
+        changed = []
+        touched = []
+        seen = set()
+        for file_path in file_paths:
+            key = self._key(file_path)
+            seen.add(key)
+            entry = entries.get(key)
+            stat = os.stat(file_path)
+            if entry is None:
+                changed.append(file_path)
+                continue
+            size, mtime, sha256 = entry
+            if size == stat.st_size and mtime == stat.st_mtime_ns:
+                continue
+            # o mtime mudou, mas o conteúdo pode ser o mesmo (ex.: upload repetido)
+            if size == stat.st_size and sha256 == file_sha256(file_path):
+                touched.append((stat.st_mtime_ns, key))
+                continue
+            changed.append(file_path)
+
+        if touched:
+            with self._lock:
+                self._conn.executemany("UPDATE files SET mtime = ? WHERE path = ?", touched)
+        removed = [key for key in entries if key not in seen]
+        return changed, removed
+
+    def pop_ids(self, file_path: str) -> List[str]:
+        key = self._key(file_path)
+        with self._lock:
+            row = self._conn.execute("SELECT ids FROM files WHERE path = ?", (key,)).fetchone()
+            if row is None:
+                return []
+            self._conn.execute("DELETE FROM files WHERE path = ?", (key,))
+        return row[0].split()
+
+    def record(self, file_path: str, ids: List[str]):
+        stat = os.stat(file_path)
+        sha256 = file_sha256(file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, sha256, ids) VALUES (?, ?, ?, ?, ?)",
+                (self._key(file_path), stat.st_size, stat.st_mtime_ns, sha256, " ".join(ids))
+            )
+
+    def paths(self) -> List[str]:
+        with self._lock:
+            return [path for (path,) in self._conn.execute("SELECT path FROM files")]
+
+    def all_ids(self) -> Set[str]:
+        with self._lock:
+            return {doc_id for (ids,) in self._conn.execute("SELECT ids FROM files") for doc_id in ids.split()}
+
+    def rename_prefix(self, old_prefix: str, new_prefix: str):
+        """Troca o diretório no início dos caminhos (ex.: documentos movidos para uma coleção)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE files SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                (new_prefix, len(old_prefix) + 1, len(old_prefix), old_prefix)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+
+    def save(self):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('in_progress', ?)", (int(self.in_progress),)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Fecha sem checkpoint: alterações não salvas são descartadas."""
+        with self._lock:
+            self._conn.close()
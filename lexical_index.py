@@ -0,0 +1,196 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+
+LEXICAL_INDEX_FILE = "lexical.sqlite"
+# abaixo desta fração da pontuação ideal da pergunta, o BM25 não achou o identificador
+KEYWORD_MIN_SCORE_RATIO = 0.5
+
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+# letras e dígitos no mesmo termo (A7X, NBR5410) ou separadores internos (CT-2024-000123, 3.2.1)
+_CODE_PATTERN = re.compile(r"^(?=\w*\d)(?=\w*[^\W\d_])\w+$|^\w+(?:[-./]\w+)+$")
+_STOPWORDS = frozenset(
+    "a o as os um uma de da do das dos e em no na nos nas por para com que se ao à "
+    "the of and to in is for on".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens em minúsculas; identificadores compostos (ex.: CT-2024-001) também geram suas partes."""
+    tokens = []
+    for match in _TOKEN_PATTERN.findall(text.casefold()):
+        if match in _STOPWORDS:
+            continue
+        tokens.append(match)
+        if any(separator in match for separator in "-./"):
+            tokens.extend(part for part in re.split(r"[-./]", match) if part and part not in _STOPWORDS)
+    return tokens
+
+
+def is_keyword_query(query: str, max_terms: int = 4) -> bool:
+    """Perguntas curtas com algum código (ex.: CT-2024-000123, A7X) ou entre aspas são buscas por identificador."""
+    stripped = query.strip()
+    if len(stripped) > 2 and stripped[0] == stripped[-1] == '"':
+        return True
+    terms = stripped.split()
+    if not terms or len(terms) > max_terms:
+        return False
+    return any(_CODE_PATTERN.match(term.strip("?!,;:().")) for term in terms)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[str]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class LexicalIndex:
+    """Índice invertido BM25 em SQLite, atualizado de forma incremental junto ao índice FAISS.
+
+    Na busca, só os termos raros (df até `common_term_ratio` dos trechos e no
+    máximo `max_postings`) geram candidatos; termos frequentes, como o "ct"
+    e o "2024" de CT-2024-000123, entram apenas na pontuação desses
+    candidatos. Sem isso, cada busca por código leria quase o índice inteiro.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, common_term_ratio: float = 0.1, max_postings: int = 5000):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.common_term_ratio = common_term_ratio
+        self.max_postings = max_postings
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA cache_size=-65536;"
+            "CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, length INTEGER NOT NULL, terms TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, doc_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO stats VALUES ('n_docs', 0), ('total_length', 0);"
+        )
+        self._conn.commit()
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]):
+        docs = []
+        postings = []
+        term_counts: Counter = Counter()
+        for doc_id, text in zip(ids, texts):
+            frequencies = Counter(tokenize(text))
+            # os termos ficam no próprio trecho para a remoção, sem um índice de postings por doc_id
+            docs.append((doc_id, sum(frequencies.values()), " ".join(frequencies)))
+            term_counts.update(frequencies.keys())
+            postings.extend((term, doc_id, tf) for term, tf in frequencies.items())
+        # em ordem de chave, as inserções caem nas mesmas páginas da árvore B
+        postings.sort()
+        with self._lock:
+            self._conn.executemany("INSERT INTO docs (id, length, terms) VALUES (?, ?, ?)", docs)
+            self._conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", postings)
+            self._conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                list(term_counts.items())
+            )
+            self._update_stats(len(docs), sum(length for _, length, _ in docs))
+            self._conn.commit()
+
+    def delete(self, ids: Sequence[str]):
+        with self._lock:
+            removed_docs = 0
+            removed_length = 0
+            for doc_id in ids:
+                row = self._conn.execute("SELECT length, terms FROM docs WHERE id = ?", (doc_id,)).fetchone()
+                if row is None:
+                    continue
+                terms = row[1].split()
+                self._conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms])
+                self._conn.executemany("DELETE FROM postings WHERE term = ? AND doc_id = ?", [(term, doc_id) for term in terms])
+                self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+                removed_docs += 1
+                removed_length += row[0]
+            self._conn.execute("DELETE FROM terms WHERE df <= 0")
+            self._update_stats(-removed_docs, -removed_length)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM postings; DELETE FROM terms; DELETE FROM docs;"
+                "UPDATE stats SET value = 0;"
+            )
+            self._conn.commit()
+
+    def _update_stats(self, docs: int, length: int):
+        self._conn.execute("UPDATE stats SET value = value + ? WHERE key = 'n_docs'", (docs,))
+        self._conn.execute("UPDATE stats SET value = value + ? WHERE key = 'total_length'", (length,))
+
+    def search(self, query: str, k: int = 10, min_score_ratio: float = 0.0) -> List[Tuple[str, float]]:
+        """Top-k por BM25; vazio se o melhor trecho não chega a `min_score_ratio` da pontuação ideal.
+
+        A pontuação ideal soma o idf de todos os termos da pergunta, inclusive
+        os ausentes do índice: um código que não existe deixa só "ct" e "2024"
+        pontuando, bem abaixo dela.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            stats = dict(self._conn.execute("SELECT key, value FROM stats").fetchall())
+            n_docs = stats["n_docs"]
+            if n_docs == 0:
+                return []
+            avg_length = stats["total_length"] / n_docs
+            placeholders = ",".join("?" * len(terms))
+            dfs = dict(self._conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms))
+            if not dfs:
+                return []
+            max_df = min(self.max_postings, max(1, int(n_docs * self.common_term_ratio)))
+            rare = [term for term in dfs if dfs[term] <= max_df] or [min(dfs, key=dfs.get)]
+            common = [term for term in dfs if term not in rare]
+
+            scores: Dict[str, float] = {}
+
+            def accumulate(rows):
+                for term, doc_id, tf, length in rows:
+                    df = dfs[term]
+                    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            # sem termos raros, o menos frequente gera os candidatos, limitado a max_postings
+            for term in rare:
+                accumulate(self._conn.execute(
+                    "SELECT p.term, p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id"
+                    " WHERE p.term = ? LIMIT ?",
+                    (term, self.max_postings)
+                ))
+            candidates = list(scores)
+            for start in range(0, len(candidates) if common else 0, 500):
+                batch = candidates[start:start + 500]
+                accumulate(self._conn.execute(
+                    "SELECT p.term, p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc_id"
+                    f" WHERE p.term IN ({','.join('?' * len(common))}) AND p.doc_id IN ({','.join('?' * len(batch))})",
+                    (*common, *batch)
+                ))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        if min_score_ratio > 0 and top:
+            ideal = sum(math.log(1 + (n_docs - dfs.get(term, 0) + 0.5) / (dfs.get(term, 0) + 0.5)) for term in terms)
+            if top[0][1] < min_score_ratio * ideal:
+                return []
+        return top
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,128 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple, TypeVar
+import asyncio
+import threading
+import time
+
+T = TypeVar("T")
+
+
+def create_llm(model: str, temperature: float, groq_api_key: Optional[str] = None, openai_api_key: Optional[str] = None) -> BaseChatModel:
+    """Cria o cliente de chat do provedor correspondente ao modelo.
+
+    OPENAI_BASE_URL / GROQ_BASE_URL no ambiente redirecionam as chamadas,
+    por exemplo para o servidor de testes em benchmarks/stub_llm_server.py.
+    O SDK de cada provedor só é importado quando um modelo dele é usado.
+    """
+    if model.startswith("llama"):
+        if not groq_api_key:
+            raise ValueError("API key da Groq é necessária para modelos Llama")
+        from langchain_groq import ChatGroq
+        return ChatGroq(model=model, temperature=temperature, api_key=groq_api_key)
+    elif model.startswith("gpt"):
+        if not openai_api_key:
+            raise ValueError("API key da OpenAI é necessária para modelos GPT")
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, temperature=temperature, api_key=openai_api_key)
+    else:
+        raise ValueError(f"Modelo não suportado: {model}")
+
+
+class LLMClientPool:
+    """Reutiliza os clientes de chat entre turnos e sessões.
+
+    Cada cliente mantém seu próprio pool HTTP keep-alive; criá-lo a cada
+    pergunta descartava a conexão (e o handshake TLS) a cada turno.
+    """
+
+    def __init__(self, idle_warm_seconds: float = 4.0, max_clients: int = 32):
+        self.idle_warm_seconds = idle_warm_seconds
+        self.max_clients = max_clients
+        self._clients: Dict[Tuple, BaseChatModel] = {}
+        self._last_used: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str, temperature: float, groq_api_key: Optional[str] = None, openai_api_key: Optional[str] = None) -> BaseChatModel:
+        key = (model, temperature, groq_api_key, openai_api_key)
+        with self._lock:
+            llm = self._clients.get(key)
+            if llm is None:
+                llm = create_llm(model, temperature, groq_api_key, openai_api_key)
+                if len(self._clients) >= self.max_clients:
+                    oldest = next(iter(self._clients))
+                    self._last_used.pop(id(self._clients.pop(oldest)), None)
+                self._clients[key] = llm
+            return llm
+
+    def mark_used(self, llm: BaseChatModel):
+        self._last_used[id(llm)] = time.monotonic()
+
+    def needs_warm(self, llm: BaseChatModel) -> bool:
+        """Conexões ociosas além do keep-alive do httpx (5 s) já foram fechadas."""
+        last_used = self._last_used.get(id(llm))
+        return last_used is None or time.monotonic() - last_used > self.idle_warm_seconds
+
+    async def warm(self, llm: BaseChatModel, timeout: float = 2.0):
+        """Abre a conexão com o provedor em paralelo à busca, sem gerar tokens.
+
+        Apenas clientes compatíveis com OpenAI expõem o cliente raiz; para os
+        demais o aquecimento é ignorado. Falhas não interrompem a resposta.
+        """
+        if not self.needs_warm(llm):
+            return
+        root_client = getattr(llm, "root_async_client", None)
+        if root_client is None:
+            return
+        try:
+            await asyncio.wait_for(root_client.models.list(), timeout)
+            self.mark_used(llm)
+        except Exception:
+            pass
+
+
+class BackgroundEventLoop:
+    """Event loop persistente em uma thread própria.
+
+    Clientes HTTP assíncronos ficam presos ao loop em que foram criados; um
+    loop único por processo permite reutilizá-los entre as execuções do
+    script do Streamlit, que são síncronas.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="chatbot-event-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine) -> T:
+        if threading.current_thread() is self._thread:
+            # esperar o resultado dentro do próprio loop o travaria
+            coroutine.close()
+            raise RuntimeError("BackgroundEventLoop.run chamado de dentro do loop de fundo; use await")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def iterate(self, async_iterator: AsyncIterator[T]) -> Iterator[T]:
+        """Consome um gerador assíncrono no loop de fundo, entregando os itens de forma síncrona."""
+        iterator = async_iterator.__aiter__()
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                self.run(aclose())
+
+
+_shared_loop: Optional[BackgroundEventLoop] = None
+_shared_loop_lock = threading.Lock()
+
+
+def shared_event_loop() -> BackgroundEventLoop:
+    """Loop de fundo único do processo, criado no primeiro uso (app e ingestão usam o mesmo)."""
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = BackgroundEventLoop()
+        return _shared_loop
@@ -1,142 +1,673 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.document_loaders import CSVLoader
-from langchain_community.document_loaders import TextLoader
-from langchain_community.document_loaders import UnstructuredWordDocumentLoader
-from langchain_community.document_loaders import UnstructuredFileLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from typing_extensions import List, Optional
+from langchain_core.embeddings import Embeddings
+from typing_extensions import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+from vector_store_manager import bump_index_generation
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from embedding_executor import EmbeddingExecutor, LangChainEmbeddingBackend, estimate_tokens
+from ingestion_manifest import MANIFEST_FILE, IngestionManifest
+from lexical_index import LexicalIndex, LEXICAL_INDEX_FILE
+from chunker import StreamingChunker
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import accumulate
 import glob
+import multiprocessing
+import os
+import queue
+import time
+import uuid
+
+# segment_store e faiss_index_factory só são importados na ingestão:
+# o dry-run e os processos de parsing não carregam o faiss
+if TYPE_CHECKING:
+    from segment_store import SegmentFAISS, SegmentStore
+
+ROWS_PER_BLOCK = 200
+TEXT_BLOCK_CHARS = 1 << 20
+# chunks por lote entregue pelo parsing, o que limita a memória por arquivo em andamento
+PARSE_BATCH_CHUNKS = 256
+TABULAR_EXTENSIONS = (".csv", ".xlsx")
+WRITER_LOCK_FILE = "ingest.lock"
+
+# preço por milhão de tokens dos modelos de embedding da OpenAI, em dólares
+EMBEDDING_PRICES_PER_MILLION = {
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+    "text-embedding-ada-002": 0.10,
+}
+
+
+@dataclass
+class IngestionProgress:
+    """Estado de uma ingestão em andamento, repassado ao `progress_callback`."""
+    files_total: int = 0
+    files_done: int = 0
+    chunks: int = 0
+    chunks_embedded: int = 0
+    removed_vectors: int = 0
+    stage: str = "parsing"
+
+
+@dataclass
+class IngestionEstimate:
+    """Resultado de um dry-run: o que seria processado e o custo aproximado dos embeddings."""
+    files: int
+    removed_files: int
+    bytes: int
+    chunks: int
+    tokens: int
+    cached_chunks: int
+    estimated_cost: Optional[float]
+
+
+def _split_row_block(block: List[str], row_start: int, chunker: StreamingChunker, metadata: dict) -> Iterator[Document]:
+    """Divide um bloco de linhas; cada chunk registra só o intervalo das linhas que contém.
+
+    Os chunks são trechos contíguos do texto do bloco, então o intervalo sai
+    da posição de cada chunk comparada ao fim de cada linha.
+    """
+    text = "\n\n".join(block)
+    # posição logo após cada linha e seu separador
+    row_ends = list(accumulate(len(row) + 2 for row in block))
+    search_from = 0
+    for chunk in chunker.split_stream([text]):
+        position = text.find(chunk, search_from)
+        if position < 0:
+            first, last = 0, len(block) - 1
+        else:
+            first = bisect_right(row_ends, position)
+            last = min(bisect_left(row_ends, position + len(chunk)), len(block) - 1)
+            # cada chunk começa depois do anterior (a sobreposição é menor que o chunk)
+            search_from = position + 1
+        yield Document(page_content=chunk, metadata={**metadata, "row_start": row_start + first, "row_end": row_start + last})
+
+
+def _row_chunks(rows: Iterator[str], chunker: StreamingChunker, rows_per_block: int, **metadata) -> Iterator[Document]:
+    """Agrupa linhas de planilhas em blocos e os divide em chunks com o intervalo de linhas de cada um."""
+    block = []
+    row_start = 0
+    for row_number, row in enumerate(rows):
+        if not block:
+            row_start = row_number
+        block.append(row)
+        if len(block) >= rows_per_block:
+            yield from _split_row_block(block, row_start, chunker, metadata)
+            block = []
+    if block:
+        yield from _split_row_block(block, row_start, chunker, metadata)
+
+
+def _iter_xlsx_chunks(file_path: str, chunker: StreamingChunker) -> Iterator[Document]:
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            header = [str(cell) if cell is not None else "" for cell in header]
+            lines = (
+                "\n".join(f"{name}: {value}" for name, value in zip(header, row) if value is not None)
+                for row in rows
+            )
+            yield from _row_chunks(lines, chunker, ROWS_PER_BLOCK, source=file_path, sheet=sheet.title)
+    finally:
+        workbook.close()
+
+
+def iter_row_chunks(file_path: str, chunker: StreamingChunker) -> Iterator[Document]:
+    """Chunks de planilhas (csv, xlsx), lidas em blocos de linhas."""
+    chunker = chunker.with_boundary("row")
+    if file_path.endswith(".csv"):
+        from langchain_community.document_loaders import CSVLoader
+        rows = (doc.page_content for doc in CSVLoader(file_path).lazy_load())
+        yield from _row_chunks(rows, chunker, ROWS_PER_BLOCK, source=file_path)
+    else:
+        yield from _iter_xlsx_chunks(file_path, chunker)
+
+
+def iter_document(file_path: str) -> Iterator[Document]:
+    """Percorre o arquivo por páginas ou elementos, sem carregá-lo inteiro em memória.
+
+    Cada loader é importado só quando aparece um arquivo da sua extensão
+    (o do Word puxa o unstructured, o mais pesado deles).
+    """
+    if file_path.endswith(".pdf"):
+        from langchain_community.document_loaders import PyPDFLoader
+        yield from PyPDFLoader(file_path).lazy_load()
+    elif file_path.endswith(".docx") or file_path.endswith(".doc"):
+        from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+        yield from UnstructuredWordDocumentLoader(file_path, mode="paged").lazy_load()
+    else:
+        raise ValueError(f"Tipo de arquivo não suportado: {file_path}")
+
+
+def iter_text_blocks(file_path: str, block_chars: int = TEXT_BLOCK_CHARS) -> Iterator[str]:
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        yield from iter(lambda: f.read(block_chars), "")
+
+
+def iter_file_chunks(file_path: str, chunker: StreamingChunker, batch_size: int = PARSE_BATCH_CHUNKS) -> Iterator[List[Document]]:
+    """Carrega e divide um arquivo em lotes de até `batch_size` chunks, sem montar a lista do arquivo inteiro."""
+    if file_path.endswith(".txt"):
+        # texto puro é lido em blocos e dividido em fluxo, sem carregar o arquivo inteiro
+        chunks = (
+            Document(page_content=text, metadata={"source": file_path})
+            for text in chunker.split_stream(iter_text_blocks(file_path))
+        )
+    elif file_path.endswith(TABULAR_EXTENSIONS):
+        chunks = iter_row_chunks(file_path, chunker)
+    else:
+        # cada página é dividida assim que lida
+        chunks = chunker.split_documents(iter_document(file_path))
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _report_parse_error(file_path: str, error: Exception):
+    if isinstance(error, ValueError):
+        print(error)
+    else:
+        print(f"Erro ao carregar {file_path}: {error}")
+
+
+_parse_queue = None
+_parse_cancel = None
+
+
+def _init_parse_worker(queue, cancel):
+    global _parse_queue, _parse_cancel
+    _parse_queue, _parse_cancel = queue, cancel
+
+
+def _stream_file(file_path: str, chunker: StreamingChunker, batch_size: int):
+    """Executado nos processos do pool: envia os lotes do arquivo pela fila limitada do processo pai."""
+    try:
+        for batch in iter_file_chunks(file_path, chunker, batch_size):
+            if _parse_cancel.is_set():
+                return
+            _parse_queue.put((file_path, batch, False))
+    except Exception as e:
+        _report_parse_error(file_path, e)
+        _parse_queue.put((file_path, None, True))
+        return
+    _parse_queue.put((file_path, [], True))
+
+
+def list_files(directory_path: str, glob_pattern: str, exclude_dir: Optional[str] = None) -> List[str]:
+    """Arquivos do diretório que casam com o padrão, ignorando o diretório do índice."""
+    full_glob_pattern = f"{directory_path}/{glob_pattern}"
+    excluded = os.path.abspath(exclude_dir) + os.sep if exclude_dir else None
+    return [
+        file_path for file_path in glob.glob(full_glob_pattern, recursive=True)
+        if os.path.isfile(file_path) and not (excluded and os.path.abspath(file_path).startswith(excluded))
+    ]
+
+
+def iter_parsed_files(
+        file_paths: List[str],
+        max_workers: int,
+        chunker: StreamingChunker,
+        batch_size: int = PARSE_BATCH_CHUNKS
+) -> Iterator[Tuple[str, Optional[List[Document]], bool]]:
+    """Entrega os chunks em lotes (arquivo, lote, último), à medida que o parsing avança.
+
+    Os lotes de um mesmo arquivo chegam em ordem, mas com vários workers os
+    arquivos se intercalam. O último lote de cada arquivo vem com `último`
+    verdadeiro; se o arquivo falhar no meio, esse lote é None e o que já foi
+    entregue dele deve ser descartado. A memória fica limitada pelos lotes na
+    fila, não pelo tamanho dos arquivos.
+    """
+    if max_workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            try:
+                for batch in iter_file_chunks(file_path, chunker, batch_size):
+                    yield file_path, batch, False
+            except Exception as e:
+                _report_parse_error(file_path, e)
+                yield file_path, None, True
+                continue
+            yield file_path, [], True
+        return
+
+    # spawn: um fork do processo do Streamlit, com várias threads, pode herdar locks travados
+    context = multiprocessing.get_context("spawn")
+    # no máximo 2 lotes por worker esperando na fila
+    results = context.Queue(maxsize=max_workers * 2)
+    cancel = context.Event()
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=context, initializer=_init_parse_worker, initargs=(results, cancel)
+    )
+    futures = [pool.submit(_stream_file, file_path, chunker, batch_size) for file_path in file_paths]
+    try:
+        remaining = len(file_paths)
+        while remaining:
+            try:
+                file_path, batch, last = results.get(timeout=1.0)
+            except queue.Empty:
+                # um worker que morre (ex.: falta de memória) não envia o último lote
+                for future in futures:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+                continue
+            remaining -= last
+            yield file_path, batch, last
+    finally:
+        # interrupção: os workers param no próximo lote; a fila é drenada para destravá-los
+        cancel.set()
+        for future in futures:
+            future.cancel()
+        while not all(future.done() for future in futures):
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        pool.shutdown()
+
+
+def estimate_ingestion(
+        directory_path: str,
+        faiss_index_path: str,
+        glob_pattern: str = "*.*",
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        boundary: str = "paragraph",
+        model_name: str = "text-embedding-3-small",
+        max_workers: Optional[int] = None,
+        embedding_cache_path: Optional[str] = ".cache/embeddings.sqlite"
+) -> IngestionEstimate:
+    """Dry-run: faz o parsing dos arquivos novos ou alterados sem gerar embeddings nem tocar no índice."""
+    file_paths = list_files(directory_path, glob_pattern, exclude_dir=faiss_index_path)
+    changed, removed = file_paths, []
+    if os.path.exists(os.path.join(faiss_index_path, MANIFEST_FILE)):
+        # fechado sem salvar: o dry-run não grava nada no índice
+        manifest = IngestionManifest(faiss_index_path)
+        changed, removed = manifest.diff(file_paths)
+        manifest.close()
+    cache = EmbeddingCache(embedding_cache_path) if embedding_cache_path and os.path.exists(embedding_cache_path) else None
+
+    chunks = tokens = cached_chunks = uncached_tokens = 0
+    try:
+        workers = max_workers or os.cpu_count() or 1
+        chunker = StreamingChunker(chunk_size, chunk_overlap, boundary)
+        for _, file_chunks, _ in iter_parsed_files(changed, workers, chunker):
+            if not file_chunks:
+                continue
+            texts = [chunk.page_content for chunk in file_chunks]
+            counts = [estimate_tokens(text) for text in texts]
+            cached = set()
+            if cache is not None and texts:
+                keys = [EmbeddingCache.make_key(model_name, text) for text in texts]
+                found = cache.contains_many(keys)
+                cached = {i for i, key in enumerate(keys) if key in found}
+            chunks += len(texts)
+            tokens += sum(counts)
+            cached_chunks += len(cached)
+            uncached_tokens += sum(count for i, count in enumerate(counts) if i not in cached)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    price = EMBEDDING_PRICES_PER_MILLION.get(model_name)
+    return IngestionEstimate(
+        files=len(changed),
+        removed_files=len(removed),
+        bytes=sum(os.path.getsize(file_path) for file_path in changed),
+        chunks=chunks,
+        tokens=tokens,
+        cached_chunks=cached_chunks,
+        estimated_cost=uncached_tokens / 1_000_000 * price if price is not None else None,
+    )
+
+
+class IngestionLockedError(RuntimeError):
+    """Outro processo (CLI ou fila de ingestão) já está gravando no mesmo índice."""
+
+
+@contextmanager
+def writer_lock(index_path: str, timeout: Optional[float] = 0.0) -> Iterator[None]:
+    """Lock exclusivo (fcntl) no diretório do índice: um único escritor por coleção.
+
+    Com `timeout` 0 falha na hora; com None espera o outro escritor terminar.
+    O lock é do arquivo aberto, então também separa loaders do mesmo processo.
+    """
+    import fcntl
+    os.makedirs(index_path, exist_ok=True)
+    with open(os.path.join(index_path, WRITER_LOCK_FILE), "a") as lock_file:
+        if timeout is None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise IngestionLockedError(f"Outra ingestão está gravando no índice '{index_path}'.")
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
 
 class MultiFileLoader:
     def __init__(
             self, directory_path: str, 
                  glob_pattern: str = "*.*", 
-                 chunk_size: int = 1000, 
-                 chunk_overlap: int = 200, 
-                 separators: str = "\n", 
+                 chunk_size: int = 256, 
+                 chunk_overlap: int = 32, 
+                 boundary: str = "paragraph", 
                  api_key: str = None, 
                  model_name: Optional[str] = "text-embedding-3-small", 
-                 faiss_index_path: str = None
+                 faiss_index_path: str = None,
+                 embedding_cache_path: Optional[str] = ".cache/embeddings.sqlite",
+                 embedding_cache_max_entries: int = 500_000,
+                 max_workers: Optional[int] = None,
+                 embedding_batch_size: int = 256,
+                 embeddings: Optional[Embeddings] = None,
+                 embedding_request_size: int = 64,
+                 embedding_concurrency: int = 4,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 index_type: str = "auto",
+                 nprobe: int = 16,
+                 progress_callback: Optional[Callable[[IngestionProgress], None]] = None,
+                 checkpoint_interval: float = 30.0,
+                 lock_timeout: Optional[float] = 0.0
     ):
         self.directory_path = directory_path
         self.glob_pattern = glob_pattern
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.separators = separators
+        self.boundary = boundary
+        # tamanhos em tokens estimados, a mesma medida usada pelos limites de cota do embedding
+        self.chunker = StreamingChunker(chunk_size, chunk_overlap, boundary)
         self.api_key = api_key
         self.model_name = model_name
         self.faiss_index_path = faiss_index_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.embedding_batch_size = embedding_batch_size
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.progress_callback = progress_callback
+        self.checkpoint_interval = checkpoint_interval
+        self.lock_timeout = lock_timeout
+
+        self.embeddings = embeddings
+        self.embedding_request_size = embedding_request_size
+        self.embedding_concurrency = embedding_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.embedding_cache_path = embedding_cache_path
+        self.embedding_cache_max_entries = embedding_cache_max_entries
+        self.embedding_cache = None
+        # embeddings e índice são construídos no primeiro uso (normalmente em load())
+        self._embedding_model: Optional[Embeddings] = None
+        self._faiss_db: Optional["SegmentFAISS"] = None
+        self._index_loaded = False
+        self._segment_store: Optional["SegmentStore"] = None
+
+        self.manifest = IngestionManifest(self.faiss_index_path)
+        self.lexical_index = LexicalIndex(os.path.join(self.faiss_index_path, LEXICAL_INDEX_FILE))
 
-        self.embedding_model = OpenAIEmbeddings(api_key=self.api_key, model=self.model_name)
+    @property
+    def embedding_model(self) -> Embeddings:
+        if self._embedding_model is None:
+            base_embeddings = self.embeddings
+            if base_embeddings is None:
+                from langchain_openai.embeddings import OpenAIEmbeddings
+                base_embeddings = OpenAIEmbeddings(api_key=self.api_key, model=self.model_name, max_retries=0)
+            # as novas tentativas ficam a cargo do executor, que respeita os limites de cota
+            embedding_model = EmbeddingExecutor(
+                LangChainEmbeddingBackend(base_embeddings),
+                batch_size=self.embedding_request_size,
+                max_concurrency=self.embedding_concurrency,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute
+            )
+            if self.embedding_cache_path:
+                self.embedding_cache = EmbeddingCache(self.embedding_cache_path, max_entries=self.embedding_cache_max_entries)
+                embedding_model = CachedEmbeddings(embedding_model, self.embedding_cache, model_name=self.model_name)
+            self._embedding_model = embedding_model
+        return self._embedding_model
 
-        self.faiss_db = self.__load_or_create_faiss_index()
+    @property
+    def segment_store(self) -> "SegmentStore":
+        if self._segment_store is None:
+            from segment_store import SegmentStore
+            self._segment_store = SegmentStore(self.faiss_index_path)
+        return self._segment_store
 
-    def __load_or_create_faiss_index(self) -> FAISS:
+    @property
+    def faiss_db(self) -> Optional["SegmentFAISS"]:
+        if not self._index_loaded:
+            self.__open_index()
+        return self._faiss_db
+
+    @faiss_db.setter
+    def faiss_db(self, store: Optional["SegmentFAISS"]):
+        self._faiss_db = store
+        self._index_loaded = True
+
+    def __open_index(self):
+        self._index_loaded = True
+        self._faiss_db = self.__load_or_create_faiss_index()
+        if self._faiss_db is None:
+            self.lexical_index.clear()
+
+    def __load_or_create_faiss_index(self) -> Optional["SegmentFAISS"]:
         try:
-            return FAISS.load_local(self.faiss_index_path, embeddings=self.embedding_model, allow_dangerous_deserialization=True)
+            faiss_db = self.segment_store.load(self.embedding_model, writable=True)
         except Exception as e:
-            print(f"Erro ao carregar FAISS: {e}. Criando um novo índice.")
-            documents = self.__load_new_database()
-            self.__create_faiss_database(documents)
-            self.__save_faiss_database()
-            return self.faiss_db
+            print(f"Erro ao carregar FAISS: {e}.")
+            faiss_db = None
+        if faiss_db is None:
+            # o índice é criado na primeira chamada de load(), em uma única passada pelos arquivos
+            print("Um novo índice FAISS será criado no próximo processamento.")
+            self.manifest.clear()
+        return faiss_db
 
-    def __create_faiss_database(self, documents: List[str]):
-        self.faiss_db = FAISS.from_documents(documents=documents, embedding=self.embedding_model)
-
-    def __save_faiss_database(self):
+    def __save_faiss_database(self, rebuilt: bool = False):
         if not self.faiss_db:
-            raise ValueError("O banco de dados FAISS não foi criado. Execute 'create_faiss_database' primeiro.")
-        self.faiss_db.save_local(self.faiss_index_path)
+            raise ValueError("O banco de dados FAISS não foi criado. Execute 'load' primeiro.")
+        # os vetores já estão no log; o índice completo só é regravado na compactação, em segundo plano
+        if rebuilt or self.segment_store.needs_compaction():
+            self.segment_store.compact(self.faiss_db)
+        bump_index_generation(self.faiss_index_path)
         print(f"Banco de dados FAISS salvo no diretório '{self.faiss_index_path}'.")
 
-    def __load_new_database(self):
-        documents = []
-        full_glob_pattern = f"{self.directory_path}/{self.glob_pattern}"
-        file_paths = glob.glob(full_glob_pattern, recursive=True)
+    def __list_files(self) -> List[str]:
+        return list_files(self.directory_path, self.glob_pattern, exclude_dir=self.faiss_index_path)
 
-        for file_path in file_paths:
-            try:
-                documents.extend(self.__load_document(file_path))
-            except ValueError as e:
-                print(e)
-            except Exception as e:
-                print(f"Erro ao carregar {file_path}: {e}")
+    def __iter_parsed_files(self, file_paths: List[str]) -> Iterator[Tuple[str, Optional[List[Document]], bool]]:
+        return iter_parsed_files(file_paths, self.max_workers, self.chunker)
 
-        chunked_documents = self.__chunk_split(documents)
-        return chunked_documents
+    def __report(self, progress: IngestionProgress):
+        if self.progress_callback is not None:
+            self.progress_callback(progress)
 
-    def load(self) -> List[Document]:
-        documents = []
-        full_glob_pattern = f"{self.directory_path}/{self.glob_pattern}"
-        file_paths = glob.glob(full_glob_pattern, recursive=True)
+    def __remove_vectors(self, ids: List[str]):
+        from segment_store import delete_from_store
+        self.segment_store.log_deletes(ids)
+        delete_from_store(self.faiss_db, ids)
+        self.lexical_index.delete(ids)
 
-        for file_path in file_paths:
-            try:
-                documents.extend(self.__load_document(file_path))
-            except ValueError as e:
-                print(e)
-            except Exception as e:
-                print(f"Erro ao carregar {file_path}: {e}")
-
-        chunked_documents = self.__chunk_split(documents)
-        embeddings = self.embedding_model.embed_documents([doc.page_content for doc in chunked_documents])
-        self.__insert_new_embeddings(chunked_documents, embeddings)
-        return chunked_documents
-
-    def __load_document(self, file_path: str) -> List[Document]:
-        if file_path.endswith(".pdf"):
-            return [PyPDFLoader(file_path).load()[0]]
-        elif file_path.endswith(".csv"):
-            return [CSVLoader(file_path).load()[0]]
-        elif file_path.endswith(".txt"):
-            return [TextLoader(file_path).load()[0]]
-        elif file_path.endswith(".docx") or file_path.endswith(".doc"):
-            return [UnstructuredWordDocumentLoader(file_path).load()[0]]
-        elif file_path.endswith(".xlsx"):
-            return [UnstructuredFileLoader(file_path).load()[0]]
-        else:
-            raise ValueError(f"Tipo de arquivo não suportado: {file_path}")
+    def __remove_orphans(self) -> int:
+        """Após uma ingestão interrompida, remove vetores de arquivos que não chegaram ao manifesto."""
+        if self.faiss_db is None:
+            return 0
+        known = self.manifest.all_ids()
+        orphans = [doc_id for doc_id in self.faiss_db.live_ids() if doc_id not in known]
+        if orphans:
+            self.__remove_vectors(orphans)
+            print(f"Retomando ingestão interrompida: removidos {len(orphans)} vetores de arquivos incompletos.")
+        return len(orphans)
 
-    def __chunk_split(self, documents: List[Document]) -> List[Document]:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=self.separators
-        )
-        return text_splitter.split_documents(documents)
+    def load(self) -> int:
+        """Ingere os arquivos novos ou alterados; falha com IngestionLockedError se outro escritor tiver o índice."""
+        with writer_lock(self.faiss_index_path, self.lock_timeout):
+            return self.__load()
 
-    def __insert_new_embeddings(self, new_documents: List[Document], new_embeddings: List[List[float]]):
-        text_embedding_pairs = list(zip([doc.page_content for doc in new_documents], new_embeddings))
-        temp_store = FAISS.from_embeddings(text_embedding_pairs, self.embedding_model)
+    def __load(self) -> int:
+        # o índice é aberto antes do diff: sem índice em disco, o manifesto é descartado
+        if not self._index_loaded:
+            # outro escritor pode ter gravado desde a criação do loader
+            self.manifest.close()
+            self.manifest = IngestionManifest(self.faiss_index_path)
+            self.__open_index()
+        changed, removed = self.manifest.diff(self.__list_files())
+        progress = IngestionProgress(files_total=len(changed), stage="removing")
+        if self.manifest.in_progress:
+            progress.removed_vectors += self.__remove_orphans()
+        self.manifest.in_progress = True
+
+        # checkpoint antes de registrar as remoções: se o processo cair depois dele,
+        # os vetores ainda não removidos viram órfãos e saem na próxima execução
+        stale_ids = []
+        for file_path in changed + removed:
+            stale_ids.extend(self.manifest.pop_ids(file_path))
+        self.manifest.save()
 
-        start_id = len(self.faiss_db.docstore._dict)
-        self.faiss_db.index.merge_from(temp_store.index)
+        batch_documents = []
+        batch_ids = []
+        # arquivos já lidos por completo, mas ainda não totalmente inseridos: (caminho, ids, posição do último chunk no fluxo)
+        pending_files = deque()
+        # ids dos arquivos ainda em leitura, que chegam em vários lotes
+        reading_ids: Dict[str, List[str]] = {}
+        # chunks de arquivos que falharam no meio; saem do índice no fim
+        failed_ids = []
+        total_chunks = 0
+        last_checkpoint = time.monotonic()
 
-        for i, text in enumerate(new_documents):
-            str_id = str(start_id + i)
-            self.faiss_db.docstore._dict[str_id] = text
+        def record_completed_files():
+            # só entram no manifesto arquivos com todos os chunks já gravados no log
+            while pending_files and pending_files[0][2] <= progress.chunks_embedded:
+                file_path, file_ids, _ = pending_files.popleft()
+                self.manifest.record(file_path, file_ids)
 
-            if isinstance(self.faiss_db.index_to_docstore_id, dict):
-                self.faiss_db.index_to_docstore_id[start_id + i] = str_id
-            else:
-                self.faiss_db.index_to_docstore_id = {
-                    j: self.faiss_db.index_to_docstore_id[j]
-                    for j in range(len(self.faiss_db.index_to_docstore_id))
-                }
-                self.faiss_db.index_to_docstore_id[start_id + i] = str_id
+        def flush(documents: List[Document], ids: List[str]):
+            nonlocal last_checkpoint
+            self.__embed_and_insert(documents, ids)
+            progress.chunks_embedded += len(documents)
+            record_completed_files()
+            if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                self.manifest.save()
+                last_checkpoint = time.monotonic()
+            self.__report(progress)
+
+        try:
+            # vetores de arquivos alterados ou removidos saem do índice
+            if stale_ids and self.faiss_db:
+                self.__remove_vectors(stale_ids)
+                progress.removed_vectors += len(stale_ids)
+                print(f"Removidos {len(stale_ids)} vetores de arquivos alterados ou removidos.")
+            progress.stage = "parsing"
+            self.__report(progress)
 
-        assert len(self.faiss_db.docstore._dict) == self.faiss_db.index.ntotal, (
+            for file_path, file_chunks, last in self.__iter_parsed_files(changed):
+                file_ids = reading_ids.setdefault(file_path, [])
+                if file_chunks is None:
+                    # o arquivo fica fora do manifesto e é reprocessado na próxima execução
+                    failed_ids.extend(reading_ids.pop(file_path))
+                    continue
+                chunk_ids = [str(uuid.uuid4()) for _ in file_chunks]
+                file_ids.extend(chunk_ids)
+                batch_documents.extend(file_chunks)
+                batch_ids.extend(chunk_ids)
+                total_chunks += len(file_chunks)
+                if last:
+                    pending_files.append((file_path, reading_ids.pop(file_path), total_chunks))
+                    progress.files_done += 1
+                progress.chunks = total_chunks
+                record_completed_files()
+                self.__report(progress)
+
+                # embeddings enviados em lotes limitados conforme os chunks chegam
+                while len(batch_documents) >= self.embedding_batch_size:
+                    flush(batch_documents[:self.embedding_batch_size], batch_ids[:self.embedding_batch_size])
+                    del batch_documents[:self.embedding_batch_size]
+                    del batch_ids[:self.embedding_batch_size]
+            if batch_documents:
+                flush(batch_documents, batch_ids)
+            if failed_ids:
+                self.__remove_vectors(failed_ids)
+                total_chunks -= len(failed_ids)
+        except BaseException:
+            # guarda o progresso; a próxima execução retoma a partir dos arquivos concluídos
+            self.manifest.save()
+            raise
+
+        if total_chunks or progress.removed_vectors:
+            progress.stage = "saving"
+            self.__report(progress)
+            rebuilt = self.__maybe_rebuild_index()
+            self.__save_faiss_database(rebuilt)
+            print(f"Adicionados {total_chunks} novos documentos ao índice FAISS!")
+
+        self.manifest.in_progress = False
+        self.manifest.save()
+        progress.stage = "done"
+        self.__report(progress)
+        return total_chunks
+
+    def __rebuild_index(self, vectors, index_type: str):
+        from faiss_index_factory import build_index
+        metric = self.faiss_db.index.metric_type
+        self.faiss_db.index = build_index(vectors, index_type, metric=metric, nprobe=self.nprobe)
+
+    def __maybe_rebuild_index(self) -> bool:
+        """Troca o tipo do índice quando a política (ou a configuração) pede outro tipo."""
+        if self.faiss_db is None:
+            return False
+        from faiss_index_factory import index_type_of, reconstruct_all, resolve_index_type
+        desired = resolve_index_type(self.index_type, self.faiss_db.index.ntotal)
+        current = index_type_of(self.faiss_db.index)
+        if desired == current:
+            return False
+        print(f"Reconstruindo o índice FAISS: {current} -> {desired} ({self.faiss_db.index.ntotal} vetores).")
+        self.__rebuild_index(reconstruct_all(self.faiss_db.index), desired)
+        return True
+
+    def __embed_and_insert(self, documents: List[Document], ids: List[str]):
+        embeddings = self.embedding_model.embed_documents([doc.page_content for doc in documents])
+        self.__insert_new_embeddings(documents, embeddings, ids)
+
+    def __insert_new_embeddings(self, new_documents: List[Document], new_embeddings: List[List[float]], ids: List[str]):
+        text_embedding_pairs = list(zip([doc.page_content for doc in new_documents], new_embeddings))
+        metadatas = [doc.metadata for doc in new_documents]
+        if self.faiss_db is None:
+            self.faiss_db = self.segment_store.create(self.embedding_model, dim=len(new_embeddings[0]))
+        self.faiss_db.add_embeddings(text_embedding_pairs, metadatas=metadatas, ids=ids)
+        self.segment_store.append(ids, new_embeddings)
+        self.lexical_index.add(ids, [doc.page_content for doc in new_documents])
+
+        assert len(self.faiss_db.index_to_docstore_id) == self.faiss_db.index.ntotal, (
             "Número de documentos não corresponde ao número de vetores"
         )
 
-        self.faiss_db.save_local(self.faiss_index_path)
-        print(f"Adicionados {len(new_documents)} novos documentos ao índice FAISS!")
+    def wait_for_compaction(self):
+        self.segment_store.wait_for_compaction()
+
+    def cache_stats(self) -> dict:
+        if not self.embedding_cache:
+            return {"hits": 0, "misses": 0}
+        return self.embedding_cache.stats()
 
     def search(self, query, k=5):
+        if self.faiss_db is None:
+            return []
         query_embedding = self.embedding_model.embed_query(query)
         results = self.faiss_db.similarity_search_with_score_by_vector(query_embedding, k=k)
         return results
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import threading
+import time
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+class TTLLRUCache:
+    """Cache LRU com expiração por tempo e contadores de acertos."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - created_at > self.ttl_seconds
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Retorna uma cópia das entradas válidas, sem alterar a ordem LRU nem os contadores."""
+        with self._lock:
+            return [(key, value) for key, (created_at, value) in self._entries.items() if not self._expired(created_at)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+class QueryCache:
+    """Nível 1: pergunta -> embedding e pergunta -> ids do top-k, exatos.
+
+    Os resultados da busca são chaveados pela geração do índice, então uma
+    nova ingestão os invalida, e pelo modo de busca (vetorial ou híbrida),
+    que dá outro top-k; o embedding da pergunta depende só do modelo.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: Optional[float] = 3600):
+        self.embeddings = TTLLRUCache(max_entries, ttl_seconds)
+        self.results = TTLLRUCache(max_entries, ttl_seconds)
+
+    def get_embedding(self, model: str, query: str) -> Optional[List[float]]:
+        return self.embeddings.get((model, normalize_query(query)))
+
+    def put_embedding(self, model: str, query: str, embedding: List[float]):
+        self.embeddings.put((model, normalize_query(query)), embedding)
+
+    def get_ids(self, generation: Optional[str], mode: str, query: str, k: int) -> Optional[List[str]]:
+        return self.results.get((generation, mode, normalize_query(query), k))
+
+    def put_ids(self, generation: Optional[str], mode: str, query: str, k: int, ids: List[str]):
+        self.results.put((generation, mode, normalize_query(query), k), ids)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {"embeddings": self.embeddings.stats(), "results": self.results.stats()}
+
+
+class SemanticAnswerCache:
+    """Nível 2: respostas reutilizadas para perguntas com embedding similar acima do limiar.
+
+    O escopo (geração do índice, modelo, temperatura) faz parte da chave, então
+    respostas nunca são servidas para outro modelo ou outra versão do índice.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512, ttl_seconds: Optional[float] = 3600):
+        self.threshold = threshold
+        self.entries = TTLLRUCache(max_entries, ttl_seconds)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, scope: Tuple, embedding: List[float]) -> Optional[str]:
+        query_vector = self._normalize(embedding)
+        best_key, best_score = None, self.threshold
+        for key, (vector, _) in self.entries.items():
+            if key[0] != scope:
+                continue
+            score = float(np.dot(query_vector, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            self.entries.misses += 1
+            return None
+        # get() atualiza a posição LRU e conta o acerto
+        entry = self.entries.get(best_key)
+        return entry[1] if entry else None
+
+    def store(self, scope: Tuple, query: str, embedding: List[float], answer: str):
+        self.entries.put((scope, normalize_query(query)), (self._normalize(embedding), answer))
+
+    def stats(self) -> Dict[str, float]:
+        return self.entries.stats()
@@ -0,0 +1,133 @@
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional, Protocol
+import json
+import os
+import threading
+import time
+
+# etapas medidas em cada resposta, na ordem em que acontecem
+STAGES = ("load", "embed", "search", "prompt", "first_token", "generation", "total")
+
+
+@dataclass
+class ResponseMetrics:
+    """Tempos (em segundos) de cada etapa de uma resposta do chatbot."""
+    model: str
+    stages: Dict[str, float] = field(default_factory=dict)
+    output_tokens: int = 0
+    answer_cache_hit: bool = False
+    lexical_fast_path: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def tokens_per_second(self) -> float:
+        generation = self.stages.get("generation", 0.0)
+        return self.output_tokens / generation if generation > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["tokens_per_second"] = self.tokens_per_second
+        return data
+
+
+class StageTimer:
+    """Cronômetro por etapa; `with timer.stage("embed"):` acumula o tempo da etapa."""
+
+    def __init__(self, metrics: ResponseMetrics):
+        self.metrics = metrics
+        self.started_at = time.perf_counter()
+
+    def stage(self, name: str) -> "_Stage":
+        return _Stage(self.metrics, name)
+
+    def mark(self, name: str, since: Optional[float] = None):
+        """Registra o tempo decorrido desde `since` (ou desde o início da resposta)."""
+        self.metrics.stages[name] = time.perf_counter() - (self.started_at if since is None else since)
+
+
+class _Stage:
+    def __init__(self, metrics: ResponseMetrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.stages[self.name] = self.metrics.stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+class MetricsSink(Protocol):
+    def record(self, metrics: ResponseMetrics) -> None:
+        ...
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class InMemoryMetricsSink:
+    """Guarda as últimas respostas para exibir percentis na interface."""
+
+    def __init__(self, max_entries: int = 500):
+        self._entries: Deque[ResponseMetrics] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: ResponseMetrics):
+        with self._lock:
+            self._entries.append(metrics)
+
+    def entries(self) -> List[ResponseMetrics]:
+        with self._lock:
+            return list(self._entries)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95 de cada etapa e da vazão de tokens."""
+        entries = self.entries()
+        summary = {}
+        for stage in STAGES:
+            values = [entry.stages[stage] for entry in entries if stage in entry.stages]
+            if values:
+                summary[stage] = {"p50": percentile(values, 50), "p95": percentile(values, 95), "count": len(values)}
+        rates = [entry.tokens_per_second for entry in entries if entry.tokens_per_second]
+        if rates:
+            summary["tokens_per_second"] = {"p50": percentile(rates, 50), "p95": percentile(rates, 95), "count": len(rates)}
+        return summary
+
+
+class JsonlMetricsSink:
+    """Acrescenta uma linha JSON por resposta a um arquivo, para análise posterior."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: ResponseMetrics):
+        line = json.dumps(metrics.to_dict(), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class FanOutMetricsSink:
+    """Repassa as métricas para vários destinos; a falha de um não afeta os demais."""
+
+    def __init__(self, *sinks: MetricsSink):
+        self.sinks = list(sinks)
+
+    def record(self, metrics: ResponseMetrics):
+        for sink in self.sinks:
+            try:
+                sink.record(metrics)
+            except Exception as e:
+                print(f"Erro ao registrar métricas: {e}")
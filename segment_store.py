@@ -0,0 +1,426 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from sqlite_docstore import SQLiteDocstore
+from faiss_index_factory import remove_labels, search_parameters
+from vector_store_manager import bump_index_generation
+from langchain_core.documents import Document
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import operator
+import json
+import os
+import struct
+import threading
+import faiss
+import numpy as np
+
+INDEX_MANIFEST_FILE = "index_manifest.json"
+DOCSTORE_FILE = "docstore.sqlite"
+SEGMENTS_DIR = "segments"
+
+_ADD = b"A"
+_DELETE = b"D"
+
+
+def _fsync_write(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _read_index(path: str, mmap: bool = False) -> faiss.Index:
+    if not mmap:
+        return faiss.read_index(path)
+    # IO_FLAG_MMAP_IFC (faiss-cpu >= 1.11) estende o mmap aos códigos dos índices flat
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+def _write_ids(path: str, ids: Sequence[str]):
+    array = np.array([doc_id.encode("utf-8") for doc_id in ids], dtype=bytes)
+    with open(path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class SegmentIds(Mapping):
+    """Mapeia posição -> id do docstore a partir do arquivo de ids do segmento, sem copiá-lo."""
+
+    def __init__(self, base: np.ndarray, extra: Sequence[str] = ()):
+        self.base = base
+        self.extra = list(extra)
+
+    def __getitem__(self, position: int) -> str:
+        if 0 <= position < len(self.base):
+            return self.base[position].decode("utf-8")
+        offset = position - len(self.base)
+        if 0 <= offset < len(self.extra):
+            return self.extra[offset]
+        raise KeyError(position)
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.extra)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+
+class SegmentFAISS(FAISS):
+    """FAISS do LangChain com remoções por lápide.
+
+    Remover só marca os rótulos: o vetor continua no índice, que não é
+    renumerado, e a linha continua no docstore compartilhado, porque leitores
+    com a versão anterior do índice ainda podem apontar para ela. A busca
+    exclui as lápides com um IDSelector; vetores e linhas só saem de fato na
+    compactação.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # rótulo -> id do docstore
+        self.tombstones: Dict[int, str] = {}
+        self._selector = None
+
+    def mark_deleted(self, ids: Iterable[str]) -> int:
+        """Marca os ids como removidos; ids desconhecidos ou já removidos são ignorados."""
+        ids_to_remove = set(ids)
+        labels = {
+            label: doc_id for label, doc_id in self.index_to_docstore_id.items()
+            if doc_id in ids_to_remove and label not in self.tombstones
+        }
+        if labels:
+            self.tombstones.update(labels)
+            self._selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype="int64")))
+        return len(labels)
+
+    def live_ids(self) -> Iterator[str]:
+        return (doc_id for label, doc_id in self.index_to_docstore_id.items() if label not in self.tombstones)
+
+    def similarity_search_with_score_by_vector(
+            self, embedding: List[float], k: int = 4, filter=None, fetch_k: int = 20, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        selector = self._selector if self.tombstones else None
+        if selector is None:
+            return super().similarity_search_with_score_by_vector(embedding, k=k, filter=filter, fetch_k=fetch_k, **kwargs)
+        # o mesmo fluxo do FAISS do LangChain, passando o seletor das lápides para o índice
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        scores, labels = self.index.search(vector, k if filter is None else fetch_k, params=search_parameters(self.index, selector))
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        docs = []
+        for score, label in zip(scores[0], labels[0]):
+            if label == -1:
+                continue
+            doc_id = self.index_to_docstore_id[label]
+            doc = self.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for id {doc_id}, got {doc}")
+            if filter_func is None or filter_func(doc.metadata):
+                docs.append((doc, score))
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            higher_is_better = self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+            compare = operator.ge if higher_is_better else operator.le
+            docs = [(doc, score) for doc, score in docs if compare(score, score_threshold)]
+        return docs[:k]
+
+
+def delete_from_store(store: SegmentFAISS, ids: List[str]) -> int:
+    """Remove os ids do store em memória, sem tocar no docstore (ver SegmentFAISS)."""
+    return store.mark_deleted(ids)
+
+
+class SegmentStore:
+    """Persistência do índice em segmentos imutáveis mais um log de inclusões e remoções.
+
+    O manifesto aponta para o segmento base e para os logs ativos; ele só é
+    substituído via os.replace, então uma queda no meio de uma escrita deixa
+    em disco sempre uma versão consistente do índice.
+    """
+
+    def __init__(self, index_path: str, compaction_ratio: float = 0.25, min_compaction_records: int = 10_000):
+        self.index_path = index_path
+        self.compaction_ratio = compaction_ratio
+        self.min_compaction_records = min_compaction_records
+        self.manifest_path = os.path.join(index_path, INDEX_MANIFEST_FILE)
+        self.log_records = 0
+        self.segment_vectors = 0
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+
+    # manifesto
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = f"{self.manifest_path}.tmp"
+        _fsync_write(tmp_path, json.dumps(manifest).encode("utf-8"))
+        os.replace(tmp_path, self.manifest_path)
+        _fsync_dir(self.index_path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path) or os.path.exists(os.path.join(self.index_path, "index.faiss"))
+
+    # log
+
+    @staticmethod
+    def _encode_add(doc_id: str, vector: np.ndarray) -> bytes:
+        encoded_id = doc_id.encode("utf-8")
+        return _ADD + struct.pack("<II", len(encoded_id), vector.shape[0]) + encoded_id + vector.tobytes()
+
+    @staticmethod
+    def _encode_delete(doc_id: str) -> bytes:
+        encoded_id = doc_id.encode("utf-8")
+        return _DELETE + struct.pack("<II", len(encoded_id), 0) + encoded_id
+
+    def _read_log(self, log_path: str, repair: bool = False) -> Tuple[List[str], List[np.ndarray], List[str]]:
+        added_ids, vectors, deleted_ids = [], [], []
+        if not os.path.exists(log_path):
+            return added_ids, vectors, deleted_ids
+        with open(log_path, "rb") as f:
+            data = f.read()
+        offset = 0
+        header = struct.calcsize("<II")
+        while offset + 1 + header <= len(data):
+            op = data[offset:offset + 1]
+            id_len, dim = struct.unpack_from("<II", data, offset + 1)
+            end = offset + 1 + header + id_len + dim * 4
+            if end > len(data):
+                # registro incompleto de uma escrita interrompida, ignorado
+                break
+            doc_id = data[offset + 1 + header:offset + 1 + header + id_len].decode("utf-8")
+            if op == _ADD:
+                added_ids.append(doc_id)
+                vectors.append(np.frombuffer(data, dtype="float32", count=dim, offset=offset + 1 + header + id_len))
+            elif op == _DELETE:
+                deleted_ids.append(doc_id)
+            offset = end
+        if repair and offset < len(data):
+            # apenas o escritor trunca o registro incompleto, antes de voltar a escrever no log
+            with open(log_path, "rb+") as f:
+                f.truncate(offset)
+        return added_ids, vectors, deleted_ids
+
+    def _append_log(self, payload: bytes, records: int):
+        manifest = self._read_manifest()
+        log_path = os.path.join(self.index_path, manifest["logs"][-1])
+        with open(log_path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.log_records += records
+
+    def append(self, ids: List[str], vectors: List[List[float]]):
+        """Registra novos vetores no log; o custo é proporcional apenas aos novos chunks."""
+        array = np.asarray(vectors, dtype="float32")
+        with self._lock:
+            self._append_log(b"".join(self._encode_add(doc_id, vector) for doc_id, vector in zip(ids, array)), len(ids))
+
+    def log_deletes(self, ids: List[str]):
+        with self._lock:
+            self._append_log(b"".join(self._encode_delete(doc_id) for doc_id in ids), len(ids))
+
+    # criação e carga
+
+    def create(self, embeddings: Embeddings, dim: int, metric: int = faiss.METRIC_L2) -> FAISS:
+        os.makedirs(os.path.join(self.index_path, SEGMENTS_DIR), exist_ok=True)
+        log_name = "append-000000.log"
+        _fsync_write(os.path.join(self.index_path, log_name), b"")
+        self._write_manifest({"version": 1, "sequence": 0, "dim": dim, "metric": metric, "segment": None, "logs": [log_name]})
+        self.log_records = 0
+        self.segment_vectors = 0
+        return SegmentFAISS(
+            embedding_function=embeddings,
+            index=faiss.IndexFlat(dim, metric),
+            docstore=SQLiteDocstore(os.path.join(self.index_path, DOCSTORE_FILE)),
+            index_to_docstore_id={}
+        )
+
+    def _load_segment(self, manifest: dict, mmap: bool = False) -> Tuple[faiss.Index, np.ndarray]:
+        segment = manifest["segment"]
+        if segment is None:
+            return faiss.IndexFlat(manifest["dim"], manifest["metric"]), np.array([], dtype=bytes)
+        index = _read_index(os.path.join(self.index_path, segment["index"]), mmap=mmap)
+        ids_path = os.path.join(self.index_path, segment["ids"])
+        if ids_path.endswith(".json"):
+            with open(ids_path, "r", encoding="utf-8") as f:
+                return index, np.array([doc_id.encode("utf-8") for doc_id in json.load(f)], dtype=bytes)
+        return index, np.load(ids_path, mmap_mode="r" if mmap else None)
+
+    def _load_mmap(self, embeddings: Embeddings, manifest: dict) -> Optional[FAISS]:
+        """Carga somente leitura: segmento mapeado em memória e log em um índice flat separado."""
+        if manifest["segment"] is None:
+            return None
+        added_ids, vectors = [], []
+        for log_name in manifest["logs"]:
+            log_added, log_vectors, log_deleted = self._read_log(os.path.join(self.index_path, log_name))
+            if log_deleted:
+                # remoções pendentes exigem a carga completa até a próxima compactação
+                return None
+            added_ids.extend(log_added)
+            vectors.extend(log_vectors)
+
+        base, base_ids = self._load_segment(manifest, mmap=True)
+        index = base
+        if added_ids:
+            delta = faiss.IndexFlat(base.d, base.metric_type)
+            delta.add(np.vstack(vectors))
+            index = faiss.IndexShards(base.d, False, True)
+            index.metric_type = base.metric_type
+            index.add_shard(base)
+            index.add_shard(delta)
+            # mantém as referências Python dos shards vivas
+            index.shards_refs = (base, delta)
+        return SegmentFAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=SQLiteDocstore(os.path.join(self.index_path, DOCSTORE_FILE)),
+            index_to_docstore_id=SegmentIds(base_ids, added_ids)
+        )
+
+    def load(self, embeddings: Embeddings, writable: bool = False, mmap: bool = False) -> Optional[FAISS]:
+        manifest = self._read_manifest()
+        if manifest is None:
+            if not os.path.exists(os.path.join(self.index_path, "index.faiss")):
+                return None
+            if not writable:
+                return FAISS.load_local(self.index_path, embeddings=embeddings, allow_dangerous_deserialization=True)
+            return self._migrate_legacy(embeddings)
+
+        if mmap and not writable:
+            store = self._load_mmap(embeddings, manifest)
+            if store is not None:
+                return store
+
+        index, ids = self._load_segment(manifest)
+        self.segment_vectors = len(ids)
+        store = SegmentFAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=SQLiteDocstore(os.path.join(self.index_path, DOCSTORE_FILE)),
+            index_to_docstore_id={position: doc_id.decode("utf-8") for position, doc_id in enumerate(ids)}
+        )
+
+        # reaplica o log sobre o segmento base; remoções viram lápides, o docstore não é alterado
+        self.log_records = 0
+        for log_name in manifest["logs"]:
+            added_ids, vectors, deleted_ids = self._read_log(os.path.join(self.index_path, log_name), repair=writable)
+            self.log_records += len(added_ids) + len(deleted_ids)
+            if added_ids:
+                start = store.index.ntotal
+                store.index.add(np.vstack(vectors))
+                store.index_to_docstore_id.update({start + i: doc_id for i, doc_id in enumerate(added_ids)})
+            if deleted_ids:
+                store.mark_deleted(deleted_ids)
+        return store
+
+    def _migrate_legacy(self, embeddings: Embeddings) -> Optional[FAISS]:
+        """Converte o formato antigo (index.faiss + index.pkl) para segmentos."""
+        legacy = FAISS.load_local(self.index_path, embeddings=embeddings, allow_dangerous_deserialization=True)
+        store = self.create(embeddings, legacy.index.d, legacy.index.metric_type)
+        store.index = legacy.index
+        store.index_to_docstore_id = dict(legacy.index_to_docstore_id)
+        store.docstore.add({doc_id: legacy.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()})
+        self.compact(store, background=False)
+        for name in ("index.faiss", "index.pkl"):
+            os.remove(os.path.join(self.index_path, name))
+        print(f"Índice FAISS migrado para o formato de segmentos em '{self.index_path}'.")
+        return store
+
+    # compactação
+
+    def needs_compaction(self) -> bool:
+        return self.log_records >= max(self.min_compaction_records, self.compaction_ratio * self.segment_vectors)
+
+    def compact(self, store: SegmentFAISS, background: bool = True):
+        """Grava o estado atual como um novo segmento e troca o manifesto de forma atômica.
+
+        O segmento novo não contém as lápides. As linhas do docstore só são
+        apagadas depois da troca do manifesto e de uma nova geração, que faz
+        os leitores recarregarem o índice.
+        """
+        self.wait_for_compaction()
+        with self._lock:
+            manifest = self._read_manifest()
+            sequence = manifest["sequence"] + 1
+            # novas inclusões passam a ir para um log novo, mantido após a compactação
+            new_log = f"append-{sequence:06d}.log"
+            _fsync_write(os.path.join(self.index_path, new_log), b"")
+            manifest["logs"].append(new_log)
+            manifest["sequence"] = sequence
+            self._write_manifest(manifest)
+            snapshot = faiss.clone_index(store.index)
+            snapshot_ids = [store.index_to_docstore_id[i] for i in range(snapshot.ntotal)]
+            tombstones = dict(getattr(store, "tombstones", {}))
+            self.log_records = 0
+
+        def write_segment():
+            nonlocal snapshot, snapshot_ids
+            if tombstones:
+                snapshot = remove_labels(snapshot, list(tombstones))
+                snapshot_ids = [doc_id for label, doc_id in enumerate(snapshot_ids) if label not in tombstones]
+            segment_name = os.path.join(SEGMENTS_DIR, f"seg-{sequence:06d}")
+            index_file, ids_file = f"{segment_name}.faiss", f"{segment_name}.ids.npy"
+            faiss.write_index(snapshot, os.path.join(self.index_path, f"{index_file}.tmp"))
+            with open(os.path.join(self.index_path, f"{index_file}.tmp"), "rb+") as f:
+                os.fsync(f.fileno())
+            _write_ids(os.path.join(self.index_path, f"{ids_file}.tmp"), snapshot_ids)
+            os.replace(os.path.join(self.index_path, f"{index_file}.tmp"), os.path.join(self.index_path, index_file))
+            os.replace(os.path.join(self.index_path, f"{ids_file}.tmp"), os.path.join(self.index_path, ids_file))
+
+            with self._lock:
+                current = self._read_manifest()
+                old_segment = current["segment"]
+                position = current["logs"].index(new_log)
+                old_logs = current["logs"][:position]
+                current["segment"] = {"index": index_file, "ids": ids_file}
+                current["logs"] = current["logs"][position:]
+                self._write_manifest(current)
+                self.segment_vectors = snapshot.ntotal
+
+            if tombstones:
+                bump_index_generation(self.index_path)
+                store.docstore.delete(list(tombstones.values()))
+            # arquivos antigos só são removidos depois da troca do manifesto
+            obsolete = old_logs + ([old_segment["index"], old_segment["ids"]] if old_segment else [])
+            for name in obsolete:
+                try:
+                    os.remove(os.path.join(self.index_path, name))
+                except FileNotFoundError:
+                    pass
+
+        if background:
+            self._compaction = threading.Thread(target=write_segment, name="faiss-compaction")
+            self._compaction.start()
+        else:
+            write_segment()
+
+    def wait_for_compaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+
+def load_vector_store(index_path: str, embeddings: Embeddings, mmap: bool = True) -> Optional[FAISS]:
+    """Carga para leitores: por padrão compartilha o segmento via page cache entre os processos."""
+    return SegmentStore(index_path).load(embeddings, mmap=mmap)
@@ -0,0 +1,58 @@
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+from typing import Dict, List, Optional, Union
+import json
+import sqlite3
+import threading
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """Docstore persistido em SQLite; cada documento é lido do disco apenas quando buscado."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id TEXT PRIMARY KEY,"
+            " page_content TEXT NOT NULL,"
+            " metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (id, page_content, metadata) VALUES (?, ?, ?)",
+                [(doc_id, doc.page_content, json.dumps(doc.metadata, default=str)) for doc_id, doc in texts.items()]
+            )
+            self._conn.commit()
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", [(doc_id,) for doc_id in ids])
+            self._conn.commit()
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM documents WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def get(self, doc_id: str) -> Optional[Document]:
+        result = self.search(doc_id)
+        return result if isinstance(result, Document) else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,91 @@
+from benchmarks.fakes import HashEmbeddings
+from benchmarks.stub_llm_server import start_server
+from collection_registry import INDEX_DIR_NAME, CollectionRegistry
+from llm_pool import LLMClientPool
+from multi_doc_loader import MultiFileLoader
+from query_cache import QueryCache, SemanticAnswerCache
+from response_metrics import InMemoryMetricsSink
+import asyncio
+import os
+import pytest
+
+RESPONSE_TOKENS = 20
+
+
+@pytest.fixture
+def backend_factory(tmp_path, monkeypatch):
+    server, base_url = start_server(connect_latency=0.0, first_token_latency=0.05, tokens_per_second=2000, response_tokens=RESPONSE_TOKENS)
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    import app
+
+    root = tmp_path / "documentos"
+    documents = root / "geral"
+    documents.mkdir(parents=True)
+    for i in range(3):
+        paragraphs = [f"Relatório {i}, seção {j}: medição de vazão e pressão na rede de distribuição." for j in range(20)]
+        (documents / f"relatorio_{i}.txt").write_text("\n\n".join(paragraphs), encoding="utf-8")
+    embeddings = HashEmbeddings()
+    loader = MultiFileLoader(
+        directory_path=str(documents),
+        glob_pattern="**/*.*",
+        faiss_index_path=os.path.join(documents, INDEX_DIR_NAME),
+        embedding_cache_path=None,
+        max_workers=1,
+        embeddings=embeddings
+    )
+    loader.load()
+    loader.wait_for_compaction()
+
+    # os recursos compartilhados do Streamlit apontam para o corpus e caches do teste
+    registry = CollectionRegistry(str(root))
+    query_cache, answer_cache, pool = QueryCache(), SemanticAnswerCache(), LLMClientPool()
+    monkeypatch.setattr(app, "get_collection_registry", lambda: registry)
+    monkeypatch.setattr(app, "get_query_embeddings", lambda *args: embeddings)
+    monkeypatch.setattr(app, "get_query_cache", lambda: query_cache)
+    monkeypatch.setattr(app, "get_answer_cache", lambda: answer_cache)
+    monkeypatch.setattr(app, "get_llm_pool", lambda: pool)
+
+    def build(**config) -> "app.ChatbotBackend":
+        sink = InMemoryMetricsSink()
+        config = app.ChatbotConfig(
+            base_model="gpt-4o-mini", temperature=0.0, embedding_model="hash", openai_api_key="stub", **config
+        )
+        return app.ChatbotBackend(config, metrics_sink=sink)
+
+    yield build
+    server.shutdown()
+
+
+async def collect(backend, query: str) -> str:
+    return "".join([chunk async for chunk in backend.aget_response(query, [])])
+
+
+def test_streamed_answer_and_stage_metrics(backend_factory):
+    backend = backend_factory()
+    answer = asyncio.run(collect(backend, "Como está a pressão na rede?"))
+
+    assert answer == "".join(f"token{i} " for i in range(RESPONSE_TOKENS))
+    [metrics] = backend.metrics_sink.entries()
+    assert not metrics.answer_cache_hit and not metrics.lexical_fast_path
+    for stage in ("load", "embed", "search", "prompt", "first_token", "generation", "total"):
+        assert metrics.stages[stage] >= 0.0, stage
+    assert metrics.stages["first_token"] <= metrics.stages["total"]
+    assert metrics.output_tokens > 0
+    assert metrics.tokens_per_second > 0
+    assert backend.metrics_sink.summary()["tokens_per_second"]["count"] == 1
+
+
+def test_similar_question_is_answered_from_the_cache(backend_factory):
+    backend = backend_factory(semantic_cache=True)
+
+    async def ask_twice():
+        return await collect(backend, "Como está a pressão na rede?"), await collect(backend, "Como está a pressão na rede?")
+    first, second = asyncio.run(ask_twice())
+
+    assert second == first
+    miss, hit = backend.metrics_sink.entries()
+    assert not miss.answer_cache_hit and hit.answer_cache_hit
+    # resposta do cache: sem busca, prompt nem geração
+    assert "first_token" in hit.stages and "total" in hit.stages
+    assert not {"search", "prompt", "generation"} & set(hit.stages)
+    assert hit.tokens_per_second == 0.0
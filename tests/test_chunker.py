@@ -0,0 +1,94 @@
+from chunker import StreamingChunker
+from embedding_executor import estimate_tokens
+from langchain_core.documents import Document
+from typing import List
+import pytest
+
+
+def sentences(n: int) -> str:
+    return " ".join(f"Frase {i:03d} sobre a medição de vazão no trecho {i}." for i in range(n))
+
+
+def paragraphs(n: int) -> List[str]:
+    return [f"Parágrafo {i}: " + " ".join(["leitura do hidrômetro e pressão na rede"] * (3 + i % 5)) for i in range(n)]
+
+
+@pytest.mark.parametrize("boundary", ["paragraph", "sentence", "row"])
+def test_chunks_never_exceed_chunk_size(boundary):
+    chunker = StreamingChunker(chunk_size=64, chunk_overlap=8, boundary=boundary)
+    # uma palavra enorme, sem fronteira, força o corte por tamanho
+    text = "\n\n".join(paragraphs(20)) + "\n" + sentences(30) + " " + "x" * 2000
+    chunks = chunker.split_text(text)
+    assert len(chunks) > 10
+    # só o último chunk pode absorver um resto menor que min_chunk_size
+    assert all(estimate_tokens(chunk) <= chunker.chunk_size for chunk in chunks[:-1])
+    assert estimate_tokens(chunks[-1]) <= chunker.chunk_size + chunker.min_chunk_size
+
+
+def test_consecutive_chunks_overlap_by_whole_units():
+    chunker = StreamingChunker(chunk_size=64, chunk_overlap=16, boundary="sentence")
+    chunks = chunker.split_text(sentences(60))
+    assert len(chunks) > 5
+    for previous, current in zip(chunks, chunks[1:]):
+        first_sentence = current[:current.index(".") + 1]
+        assert previous.endswith(first_sentence)
+        assert estimate_tokens(first_sentence) <= chunker.chunk_overlap
+
+
+def test_without_overlap_the_text_is_partitioned():
+    chunker = StreamingChunker(chunk_size=64, chunk_overlap=0, boundary="sentence")
+    text = sentences(60)
+    assert " ".join(chunker.split_text(text)) == text
+
+
+def test_paragraph_boundary_keeps_paragraphs_whole():
+    chunker = StreamingChunker(chunk_size=128, chunk_overlap=0, boundary="paragraph")
+    originals = paragraphs(30)
+    chunks = chunker.split_text("\n\n".join(originals))
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert all(part in originals for part in chunk.split("\n\n"))
+
+
+def test_sentence_boundary_cuts_after_punctuation():
+    chunker = StreamingChunker(chunk_size=48, chunk_overlap=8, boundary="sentence")
+    # sem quebras de parágrafo: a frase é a fronteira mais forte
+    chunks = chunker.split_text(sentences(40))
+    assert len(chunks) > 5
+    assert all(chunk.startswith("Frase") and chunk.endswith(".") for chunk in chunks)
+
+
+def test_row_boundary_keeps_rows_whole():
+    chunker = StreamingChunker(chunk_size=64, chunk_overlap=0, boundary="row")
+    rows = [f"id={i}; cliente=Cliente {i}; consumo={i * 7} m3; situação=ativa" for i in range(80)]
+    chunks = chunker.split_text("\n".join(rows))
+    assert len(chunks) > 5
+    assert [row for chunk in chunks for row in chunk.split("\n")] == rows
+
+
+def test_stream_in_pieces_matches_whole_text():
+    chunker = StreamingChunker(chunk_size=64, chunk_overlap=8, boundary="paragraph")
+    text = "\n\n".join(paragraphs(25))
+    pieces = [text[start:start + 97] for start in range(0, len(text), 97)]
+    assert list(chunker.split_stream(pieces)) == chunker.split_text(text)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_split_documents_propagates_metadata(max_workers):
+    chunker = StreamingChunker(chunk_size=64, chunk_overlap=8)
+    documents = [
+        Document(page_content="\n\n".join(paragraphs(6 + i)), metadata={"source": f"doc_{i}.txt", "page": i})
+        for i in range(5)
+    ]
+    chunks = list(chunker.split_documents(documents, max_workers=max_workers, batch_size=2))
+
+    expected = [
+        (document.metadata, text)
+        for document in documents
+        for text in chunker.split_text(document.page_content)
+    ]
+    assert [(chunk.metadata, chunk.page_content) for chunk in chunks] == expected
+    # cada chunk tem a própria cópia dos metadados
+    chunks[0].metadata["page"] = 99
+    assert documents[0].metadata["page"] == 0
+    assert chunks[1].metadata["page"] == 0
@@ -0,0 +1,95 @@
+from benchmarks.fakes import HashEmbeddings
+from collection_registry import INDEX_DIR_NAME, CollectionRegistry
+from lexical_index import LEXICAL_INDEX_FILE, LexicalIndex
+from segment_store import SegmentStore
+from vector_store_manager import bump_index_generation
+from typing import List
+import faiss
+import os
+import uuid
+
+EMBEDDINGS = HashEmbeddings()
+
+
+def build_collection(root: str, name: str, texts: List[str], metric: int = faiss.METRIC_L2):
+    """Coleção pequena em disco, no mesmo layout da ingestão."""
+    index_path = os.path.join(root, name, INDEX_DIR_NAME)
+    segment_store = SegmentStore(index_path)
+    vectors = EMBEDDINGS.embed_documents(texts)
+    ids = [str(uuid.uuid4()) for _ in texts]
+    store = segment_store.create(EMBEDDINGS, dim=len(vectors[0]), metric=metric)
+    store.add_embeddings(list(zip(texts, vectors)), metadatas=[{"source": name} for _ in texts], ids=ids)
+    segment_store.append(ids, vectors)
+    LexicalIndex(os.path.join(index_path, LEXICAL_INDEX_FILE)).add(ids, texts)
+    bump_index_generation(index_path)
+
+
+def texts_for(name: str, n: int = 20) -> List[str]:
+    return [f"{name}: laudo técnico {i} da obra" for i in range(n)]
+
+
+def test_lru_eviction_keeps_queried_collections(tmp_path):
+    root = str(tmp_path)
+    for name in ("a", "b", "c"):
+        build_collection(root, name, texts_for(name))
+    registry = CollectionRegistry(root)
+    [a] = registry.acquire(["a"], EMBEDDINGS)
+    assert a.memory_bytes > 0
+
+    # cabem duas coleções: a menos usada recentemente sai quando a terceira é carregada
+    registry.memory_budget_bytes = 2 * a.memory_bytes
+    registry.acquire(["b"], EMBEDDINGS)
+    registry.acquire(["c"], EMBEDDINGS)
+    assert list(registry.memory_usage()) == ["b", "c"]
+    registry.acquire(["b"], EMBEDDINGS)
+    registry.acquire(["a"], EMBEDDINGS)
+    assert list(registry.memory_usage()) == ["b", "a"]
+    assert registry.evictions == 2
+
+    # acima do orçamento, as coleções da consulta atual continuam carregadas
+    registry.memory_budget_bytes = 1
+    loaded = registry.acquire(["a", "c"], EMBEDDINGS)
+    assert [collection.name for collection in loaded] == ["a", "c"]
+    assert set(registry.memory_usage()) == {"a", "c"}
+    assert all(collection.store is not None for collection in loaded)
+
+
+def test_acquire_skips_collections_without_index(tmp_path):
+    build_collection(str(tmp_path), "a", texts_for("a"))
+    registry = CollectionRegistry(str(tmp_path))
+    registry.create("vazia")
+    assert [collection.name for collection in registry.acquire(["vazia", "a"], EMBEDDINGS)] == ["a"]
+    assert list(registry.memory_usage()) == ["a"]
+
+
+def test_search_merges_top_k_across_metrics(tmp_path):
+    root = str(tmp_path)
+    l2_texts, ip_texts = texts_for("l2"), texts_for("ip")
+    build_collection(root, "l2", l2_texts)
+    build_collection(root, "ip", ip_texts, metric=faiss.METRIC_INNER_PRODUCT)
+    registry = CollectionRegistry(root)
+    collections = registry.acquire(["l2", "ip"], EMBEDDINGS)
+
+    query = EMBEDDINGS.embed_query("laudo técnico da obra")
+    results = registry.search(collections, query, k=6)
+
+    # vetores normalizados: distância L2 e produto interno dão a mesma ordem de similaridade
+    def similarity(text: str) -> float:
+        return sum(x * y for x, y in zip(EMBEDDINGS.embed_query(text), query))
+    expected = sorted(l2_texts + ip_texts, key=similarity, reverse=True)[:6]
+    assert [doc.page_content for doc in results] == expected
+    assert {doc.metadata["collection"] for doc in results} == {"l2", "ip"}
+    assert all(doc.metadata["collection"] == doc.metadata["source"] for doc in results)
+
+
+def test_lexical_search_merges_collections(tmp_path):
+    root = str(tmp_path)
+    build_collection(root, "a", texts_for("a") + ["contrato CT-2024-000123 de manutenção"])
+    build_collection(root, "b", texts_for("b"))
+    registry = CollectionRegistry(root)
+    collections = registry.acquire(["a", "b"], EMBEDDINGS)
+
+    ids = registry.lexical_search(collections, "CT-2024-000123", k=3)
+    [doc] = registry.fetch(collections, ids[:1])
+    assert doc.page_content.startswith("contrato CT-2024-000123") and doc.metadata["collection"] == "a"
+    assert registry.lexical_search(collections, "CT-2024-999999", k=3, min_score_ratio=0.5) == []
@@ -0,0 +1,160 @@
+from benchmarks.stub_llm_server import start_server
+from embedding_executor import EmbeddingExecutor, LangChainEmbeddingBackend, TokenBucket
+from langchain_openai import OpenAIEmbeddings
+from multi_doc_loader import MultiFileLoader
+from typing import List
+import asyncio
+import embedding_executor
+import os
+import pytest
+import time
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class FlakyBackend(LangChainEmbeddingBackend):
+    """Backend determinístico: as primeiras `failures` chamadas falham com `error`.
+
+    O vetor de cada texto é o número no fim dele, e lotes com números maiores
+    respondem antes, para embaralhar a ordem em que os lotes terminam.
+    """
+
+    def __init__(self, failures: int = 0, error: type = RateLimitError):
+        super().__init__(embeddings=None)
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("falha simulada")
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        values = [float(text.split()[-1]) for text in texts]
+        await asyncio.sleep(0.02 / (1 + values[0]))
+        self.active -= 1
+        return [[value] for value in values]
+
+
+@pytest.fixture
+def backoff_delays(monkeypatch):
+    """Jitter sem aleatoriedade (sempre o teto) e registro das esperas pedidas."""
+    delays = []
+
+    def uniform(low, high):
+        delays.append(high)
+        return high
+    monkeypatch.setattr(embedding_executor.random, "uniform", uniform)
+    return delays
+
+
+@pytest.fixture(scope="module")
+def stub_embeddings():
+    server, base_url = start_server(connect_latency=0.0, first_token_latency=0.0)
+    # sem a checagem de contexto, que baixaria o tokenizer do tiktoken
+    yield OpenAIEmbeddings(
+        api_key="stub", base_url=base_url, model="text-embedding-3-small", check_embedding_ctx_length=False, max_retries=0
+    )
+    server.shutdown()
+
+
+def test_executor_reuses_async_client_across_calls(stub_embeddings):
+    executor = EmbeddingExecutor(LangChainEmbeddingBackend(stub_embeddings), batch_size=4, max_retries=0)
+    first = executor.embed_documents([f"texto {i}" for i in range(10)])
+    second = executor.embed_documents(["outro texto"])
+    assert len(first) == 10 and len(second) == 1
+    assert len(executor.embed_query("pergunta")) == 1536
+
+
+def test_ingest_with_several_batches_and_search(stub_embeddings, tmp_path):
+    documents = tmp_path / "documentos"
+    documents.mkdir()
+    for i in range(4):
+        paragraphs = [f"Arquivo {i}, parágrafo {j}: " + "conteúdo de teste " * 40 for j in range(10)]
+        (documents / f"doc_{i}.txt").write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+    loader = MultiFileLoader(
+        directory_path=str(documents),
+        glob_pattern="**/*.*",
+        faiss_index_path=os.path.join(documents, "faiss_index_chatbot"),
+        embedding_cache_path=None,
+        max_workers=1,
+        embedding_batch_size=16,
+        embeddings=stub_embeddings
+    )
+    chunks = loader.load()
+    loader.wait_for_compaction()
+
+    assert chunks > 16
+    assert loader.faiss_db.index.ntotal == chunks
+    assert len(loader.search("conteúdo de teste", k=3)) == 3
+
+
+def test_token_bucket_waits_for_refill():
+    async def consume():
+        bucket = TokenBucket(per_minute=1200)
+        start = time.perf_counter()
+        # a capacidade inteira sai de uma vez; acima dela, a taxa é de 20 por segundo
+        await bucket.acquire(1200)
+        burst = time.perf_counter() - start
+        await bucket.acquire(4)
+        return burst, time.perf_counter() - start
+    burst, total = asyncio.run(consume())
+    assert burst < 0.05
+    assert total >= 0.18
+
+
+def test_requests_per_minute_limits_batches():
+    backend = FlakyBackend()
+    executor = EmbeddingExecutor(backend, batch_size=1, max_concurrency=4, requests_per_minute=600)
+    executor.limits["requests"].tokens = 0
+    start = time.perf_counter()
+    asyncio.run(executor.aembed_documents([f"texto {i}" for i in range(5)]))
+    # 10 requisições por segundo, sem rajada inicial
+    assert time.perf_counter() - start >= 0.45
+    assert backend.calls == executor.requests == 5
+
+
+def test_rate_limited_batches_retry_with_exponential_backoff(backoff_delays):
+    backend = FlakyBackend(failures=3)
+    executor = EmbeddingExecutor(backend, batch_size=4, base_delay=0.01, max_delay=0.03)
+    vectors = asyncio.run(executor.aembed_documents([f"texto {i}" for i in range(4)]))
+    assert vectors == [[0.0], [1.0], [2.0], [3.0]]
+    assert backend.calls == 4 and executor.retries == 3
+    assert backoff_delays == [0.01, 0.02, 0.03]
+
+
+def test_retries_stop_after_max_retries(backoff_delays):
+    backend = FlakyBackend(failures=10)
+    executor = EmbeddingExecutor(backend, batch_size=4, max_retries=2, base_delay=0.001)
+    with pytest.raises(RateLimitError):
+        asyncio.run(executor.aembed_documents(["texto 1"]))
+    assert backend.calls == 3 and executor.retries == 2
+
+
+@pytest.mark.parametrize("error", [BadRequestError, ValueError])
+def test_non_retryable_errors_are_raised_immediately(error, backoff_delays):
+    backend = FlakyBackend(failures=1, error=error)
+    executor = EmbeddingExecutor(backend, batch_size=4, base_delay=0.001)
+    with pytest.raises(error):
+        asyncio.run(executor.aembed_documents(["texto 1"]))
+    assert backend.calls == 1 and executor.retries == 0
+    assert backoff_delays == []
+
+
+def test_concurrent_batches_are_reassembled_in_order(backoff_delays):
+    backend = FlakyBackend(failures=2)
+    executor = EmbeddingExecutor(backend, batch_size=3, max_concurrency=4, base_delay=0.001)
+    texts = [f"texto {i}" for i in range(30)]
+    vectors = asyncio.run(executor.aembed_documents(texts))
+    assert vectors == [[float(i)] for i in range(30)]
+    assert backend.max_active == 4
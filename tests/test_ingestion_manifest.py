@@ -0,0 +1,22 @@
+from ingestion_manifest import IngestionManifest
+
+
+def test_changes_persist_only_after_save(tmp_path):
+    index_path = str(tmp_path / "indice")
+    document = tmp_path / "a.txt"
+    document.write_text("conteúdo", encoding="utf-8")
+
+    manifest = IngestionManifest(index_path)
+    manifest.record(str(document), ["id-1", "id-2"])
+    manifest.in_progress = True
+    manifest.save()
+    manifest.record(str(tmp_path / "a.txt"), ["id-3"])
+    # queda antes do checkpoint: a transação aberta é descartada
+    manifest.close()
+
+    reopened = IngestionManifest(index_path)
+    assert reopened.in_progress
+    assert reopened.all_ids() == {"id-1", "id-2"}
+    assert reopened.diff([str(document)]) == ([], [])
+    assert reopened.pop_ids(str(document)) == ["id-1", "id-2"]
+    assert reopened.diff([str(document)]) == ([str(document)], [])
@@ -0,0 +1,50 @@
+from lexical_index import KEYWORD_MIN_SCORE_RATIO, LexicalIndex, is_keyword_query
+import pytest
+
+
+def build_index(path: str, n_docs: int = 300) -> LexicalIndex:
+    lexical = LexicalIndex(path)
+    lexical.add(
+        [f"doc{i}" for i in range(n_docs)],
+        [f"contrato de fornecimento CT-2024-{i:06d} assinado em 2024" for i in range(n_docs)]
+    )
+    return lexical
+
+
+def test_identifier_lookup_ranks_exact_code_first(tmp_path):
+    lexical = build_index(str(tmp_path / "lexical.sqlite"))
+    assert lexical.search("contrato CT-2024-000123", k=3)[0][0] == "doc123"
+    # só termos frequentes: o menos frequente ainda gera candidatos
+    assert len(lexical.search("contrato 2024", k=5)) == 5
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Explique o RAG", False),
+    ("Quanto custa 2 unidades?", False),
+    ("Resuma o PDF", False),
+    ("contrato CT-2024-000123", True),
+    ("peça A7X", True),
+    ("norma NBR5410?", True),
+    ("seção 3.2.1.", True),
+    ('"cláusula de rescisão"', True),
+])
+def test_keyword_query_requires_code_like_terms(query, expected):
+    assert is_keyword_query(query) is expected
+
+
+def test_weak_top_score_falls_back(tmp_path):
+    lexical = build_index(str(tmp_path / "lexical.sqlite"))
+    assert lexical.search("CT-2024-000123", k=3, min_score_ratio=KEYWORD_MIN_SCORE_RATIO)[0][0] == "doc123"
+    # código inexistente: só "ct" e "2024" pontuam e o resultado fraco é descartado
+    assert lexical.search("CT-2024-999999", k=3)
+    assert lexical.search("CT-2024-999999", k=3, min_score_ratio=KEYWORD_MIN_SCORE_RATIO) == []
+
+
+def test_delete_removes_postings_and_updates_df(tmp_path):
+    lexical = build_index(str(tmp_path / "lexical.sqlite"))
+    lexical.delete(["doc123", "doc7"])
+    assert all(doc_id != "doc123" for doc_id, _ in lexical.search("CT-2024-000123", k=3))
+    df = lexical._conn.execute("SELECT df FROM terms WHERE term = 'contrato'").fetchone()[0]
+    assert df == 298
+    assert lexical._conn.execute("SELECT COUNT(*) FROM postings WHERE doc_id = 'doc7'").fetchone()[0] == 0
+
@@ -0,0 +1,201 @@
+from benchmarks.fakes import HashEmbeddings
+from chunker import StreamingChunker
+from multi_doc_loader import IngestionLockedError, MultiFileLoader, iter_file_chunks, iter_parsed_files, writer_lock
+import os
+import pytest
+import threading
+
+
+def write_documents(directory, n_files: int = 3):
+    directory.mkdir()
+    for i in range(n_files):
+        paragraphs = [f"Relatório {i}, seção {j}: " + "medição de vazão e pressão " * 30 for j in range(8)]
+        (directory / f"relatorio_{i}.txt").write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+
+def build_loader(directory, embeddings) -> MultiFileLoader:
+    return MultiFileLoader(
+        directory_path=str(directory),
+        glob_pattern="**/*.*",
+        faiss_index_path=os.path.join(directory, "faiss_index_chatbot"),
+        embedding_cache_path=None,
+        max_workers=1,
+        embedding_batch_size=8,
+        embeddings=embeddings
+    )
+
+
+def test_first_ingest_embeds_each_chunk_once(tmp_path):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    embeddings = HashEmbeddings()
+
+    loader = build_loader(documents, embeddings)
+    assert embeddings.texts_embedded == 0
+    chunks = loader.load()
+    loader.wait_for_compaction()
+
+    assert chunks > 8
+    assert embeddings.texts_embedded == chunks
+    assert loader.faiss_db.index.ntotal == chunks
+
+
+def test_reload_without_changes_embeds_nothing(tmp_path):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    first = build_loader(documents, HashEmbeddings())
+    chunks = first.load()
+    first.wait_for_compaction()
+
+    embeddings = HashEmbeddings()
+    loader = build_loader(documents, embeddings)
+    assert loader.load() == 0
+    assert embeddings.texts_embedded == 0
+    assert loader.faiss_db.index.ntotal == chunks
+
+
+def test_csv_chunks_record_their_own_row_range(tmp_path):
+    csv_path = tmp_path / "medicoes.csv"
+    rows = [f"{i},ponto {i},{'leitura de vazão ' * 12}" for i in range(450)]
+    csv_path.write_text("linha,ponto,observacao\n" + "\n".join(rows), encoding="utf-8")
+
+    chunks = [chunk for batch in iter_file_chunks(str(csv_path), StreamingChunker(chunk_size=128, chunk_overlap=16)) for chunk in batch]
+
+    assert len(chunks) > 3
+    assert chunks[0].metadata["row_start"] == 0
+    assert chunks[-1].metadata["row_end"] == 449
+    for chunk in chunks:
+        start, end = chunk.metadata["row_start"], chunk.metadata["row_end"]
+        assert end - start < 20
+        listed = [int(line.split(": ")[1]) for line in chunk.page_content.splitlines() if line.startswith("linha: ")]
+        assert listed and start <= listed[0] and listed[-1] <= end
+
+
+def collect(batches):
+    files = {}
+    for path, batch, last in batches:
+        files.setdefault(path, []).extend(chunk.page_content for chunk in batch or [])
+    return files
+
+
+def test_parallel_parsing_streams_bounded_batches(tmp_path):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    file_paths = sorted(str(path) for path in documents.iterdir())
+    chunker = StreamingChunker()
+
+    batches = list(iter_parsed_files(file_paths, 2, chunker, batch_size=3))
+    assert all(len(batch) <= 3 for _, batch, _ in batches)
+    assert [path for path, _, last in batches if last] and len(batches) > len(file_paths) * 2
+    assert collect(batches) == collect(iter_parsed_files(file_paths, 1, chunker))
+
+
+def test_failed_file_is_skipped_and_retried(tmp_path):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    (documents / "corrompido.xlsx").write_bytes(b"nao e uma planilha")
+    loader = build_loader(documents, HashEmbeddings())
+    chunks = loader.load()
+    loader.wait_for_compaction()
+
+    assert loader.faiss_db.index.ntotal == chunks == len(loader.manifest.all_ids())
+    assert all(not path.endswith("corrompido.xlsx") for path in loader.manifest.paths())
+
+
+def test_interrupted_removal_does_not_block_later_ingests(tmp_path, monkeypatch):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    first = build_loader(documents, HashEmbeddings())
+    first.load()
+    first.wait_for_compaction()
+    (documents / "relatorio_1.txt").write_text("Relatório revisado: " + "nova medição " * 40, encoding="utf-8")
+
+    # queda logo depois de registrar as remoções no log
+    import segment_store
+
+    def interrupted(store, ids):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(segment_store, "delete_from_store", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        build_loader(documents, HashEmbeddings()).load()
+    monkeypatch.undo()
+
+    for _ in range(2):
+        loader = build_loader(documents, HashEmbeddings())
+        loader.load()
+        loader.wait_for_compaction()
+    sources = {loader.faiss_db.docstore.search(doc_id).metadata["source"] for doc_id in loader.faiss_db.live_ids()}
+    assert len(sources) == 3
+    assert sum(1 for _ in loader.faiss_db.live_ids()) == len(loader.manifest.all_ids())
+
+
+def test_file_failing_midway_leaves_no_vectors(tmp_path, monkeypatch):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    import multi_doc_loader
+    original = multi_doc_loader.iter_file_chunks
+
+    def failing(file_path, chunker, batch_size):
+        for number, batch in enumerate(original(file_path, chunker, 2)):
+            if file_path.endswith("relatorio_1.txt") and number == 2:
+                raise OSError("disco removido")
+            yield batch
+    monkeypatch.setattr(multi_doc_loader, "iter_file_chunks", failing)
+
+    loader = build_loader(documents, HashEmbeddings())
+    chunks = loader.load()
+    loader.wait_for_compaction()
+    live = list(loader.faiss_db.live_ids())
+    assert len(live) == chunks == len(loader.manifest.all_ids())
+    assert all(not path.endswith("relatorio_1.txt") for path in loader.manifest.paths())
+
+
+def test_second_writer_fails_fast_or_waits_for_the_lock(tmp_path):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    embeddings = HashEmbeddings()
+    loader = build_loader(documents, embeddings)
+
+    with writer_lock(loader.faiss_index_path):
+        with pytest.raises(IngestionLockedError):
+            loader.load()
+    assert embeddings.texts_embedded == 0
+
+    # com espera, o loader ingere assim que o outro escritor libera o índice
+    loader.lock_timeout = 5.0
+    with writer_lock(loader.faiss_index_path):
+        waiting = threading.Thread(target=loader.load)
+        waiting.start()
+        waiting.join(0.3)
+        assert waiting.is_alive()
+    waiting.join()
+    loader.wait_for_compaction()
+    assert embeddings.texts_embedded == loader.faiss_db.index.ntotal > 0
+
+
+def test_modified_and_deleted_files_lose_exactly_their_vectors(tmp_path):
+    documents = tmp_path / "documentos"
+    write_documents(documents)
+    first = build_loader(documents, HashEmbeddings())
+    first.load()
+    first.wait_for_compaction()
+    before = {}
+    for doc_id in first.faiss_db.live_ids():
+        source = os.path.basename(first.faiss_db.docstore.search(doc_id).metadata["source"])
+        before.setdefault(source, set()).add(doc_id)
+
+    (documents / "relatorio_0.txt").write_text("Relatório revisado: " + "nova medição " * 40, encoding="utf-8")
+    (documents / "relatorio_1.txt").unlink()
+    loader = build_loader(documents, HashEmbeddings())
+    loader.load()
+    loader.wait_for_compaction()
+
+    live = set(loader.faiss_db.live_ids())
+    assert live == loader.manifest.all_ids()
+    # o arquivo intocado mantém os mesmos vetores; os demais não deixam nenhum
+    assert before["relatorio_2.txt"] <= live
+    assert not live & (before["relatorio_0.txt"] | before["relatorio_1.txt"])
+    new_ids = live - before["relatorio_2.txt"]
+    assert new_ids
+    assert {os.path.basename(loader.faiss_db.docstore.search(doc_id).metadata["source"]) for doc_id in new_ids} == {"relatorio_0.txt"}
+    assert {doc_id for (doc_id,) in loader.lexical_index._conn.execute("SELECT id FROM docs")} == live
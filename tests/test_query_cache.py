@@ -0,0 +1,67 @@
+from query_cache import QueryCache, SemanticAnswerCache
+from typing import List
+import math
+import query_cache
+
+
+def test_ids_are_keyed_by_retrieval_mode():
+    cache = QueryCache()
+    cache.put_ids(("geral", "g1"), "vector", "Qual o prazo do contrato?", 3, ["a", "b", "c"])
+    assert cache.get_ids(("geral", "g1"), "hybrid", "Qual o prazo do contrato?", 3) is None
+    assert cache.get_ids(("geral", "g1"), "vector", "qual o prazo do contrato? ", 3) == ["a", "b", "c"]
+
+
+def rotated(angle_cos: float, sign: float = 1.0) -> List[float]:
+    """Vetor unitário com similaridade de cosseno `angle_cos` com [1, 0, 0]."""
+    return [angle_cos, sign * math.sqrt(1 - angle_cos ** 2), 0.0]
+
+
+SCOPE = (("geral", "g1"), "hybrid", "gpt-4o-mini", 0.6)
+
+
+def test_answer_cache_matches_above_threshold_only():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store(SCOPE, "Qual o prazo do contrato?", [2.0, 0.0, 0.0], "30 dias")
+    cache.store(SCOPE, "Qual a multa do contrato?", rotated(0.9, sign=-1.0), "10%")
+
+    # a comparação usa vetores normalizados: [2, 0, 0] equivale a [1, 0, 0]
+    assert cache.lookup(SCOPE, rotated(0.97)) == "30 dias"
+    assert cache.lookup(SCOPE, rotated(0.8, sign=-1.0)) == "10%"
+    assert cache.lookup(SCOPE, [0.0, 0.0, 1.0]) is None
+    assert cache.lookup(SCOPE, rotated(0.93)) is None
+
+
+def test_answer_cache_is_isolated_by_scope():
+    cache = SemanticAnswerCache()
+    cache.store(SCOPE, "Qual o prazo do contrato?", [1.0, 0.0, 0.0], "30 dias")
+    generation, mode, model, temperature = SCOPE
+    for other in (
+        (("geral", "g2"), mode, model, temperature),
+        (generation, mode, "gpt-4o", temperature),
+        (generation, mode, model, 0.0),
+    ):
+        assert cache.lookup(other, [1.0, 0.0, 0.0]) is None
+    assert cache.lookup(SCOPE, [1.0, 0.0, 0.0]) == "30 dias"
+
+
+def test_answer_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(ttl_seconds=60)
+    cache.store(SCOPE, "Qual o prazo do contrato?", [1.0, 0.0, 0.0], "30 dias")
+    now[0] += 59
+    assert cache.lookup(SCOPE, [1.0, 0.0, 0.0]) == "30 dias"
+    now[0] += 2
+    assert cache.lookup(SCOPE, [1.0, 0.0, 0.0]) is None
+
+
+def test_answer_cache_counts_hits_and_misses():
+    cache = SemanticAnswerCache()
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.lookup(SCOPE, [1.0, 0.0, 0.0])
+    cache.store(SCOPE, "Qual o prazo do contrato?", [1.0, 0.0, 0.0], "30 dias")
+    for _ in range(3):
+        cache.lookup(SCOPE, [1.0, 0.0, 0.0])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 1, 1)
+    assert stats["hit_rate"] == 0.75
@@ -0,0 +1,13 @@
+from vector_store_manager import bump_index_generation, read_index_generation
+import shutil
+
+
+def test_generation_is_not_reused_after_erase(tmp_path):
+    index_path = tmp_path / "faiss_index_chatbot"
+    index_path.mkdir()
+    first = bump_index_generation(str(index_path))
+    assert read_index_generation(str(index_path)) == first
+
+    shutil.rmtree(index_path)
+    index_path.mkdir()
+    assert bump_index_generation(str(index_path)) != first
@@ -0,0 +1,88 @@
+from langchain_core.embeddings import Embeddings
+from typing import TYPE_CHECKING, Callable, Optional
+import os
+import threading
+import uuid
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+GENERATION_FILE = "generation"
+
+
+def read_index_generation(index_path: str) -> Optional[str]:
+    """Retorna a geração atual do índice salvo em disco (ou None se não existir)."""
+    generation_path = os.path.join(index_path, GENERATION_FILE)
+    try:
+        with open(generation_path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # índices antigos não possuem o arquivo de geração, usa o mtime como fallback
+    index_file = os.path.join(index_path, "index.faiss")
+    if os.path.exists(index_file):
+        return f"mtime:{os.stat(index_file).st_mtime_ns}"
+    return None
+
+
+def bump_index_generation(index_path: str) -> str:
+    """Grava uma nova geração do índice, sinalizando uma nova versão aos leitores.
+
+    A geração é um token único, não um contador: depois de apagar a coleção e
+    reindexar, um contador voltaria a 1 e coincidiria com as versões em
+    memória e com as chaves de cache da ingestão anterior.
+    """
+    generation = uuid.uuid4().hex
+    generation_path = os.path.join(index_path, GENERATION_FILE)
+    tmp_path = f"{generation_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(generation)
+    os.replace(tmp_path, generation_path)
+    return generation
+
+
+def _load_vector_store(index_path: str, embeddings: Embeddings) -> Optional["FAISS"]:
+    # importado na primeira carga: FAISS e langchain_community não entram no início do app
+    from segment_store import load_vector_store
+    return load_vector_store(index_path, embeddings)
+
+
+class VectorStoreManager:
+    """Mantém uma única instância do índice FAISS em memória, compartilhada entre sessões."""
+
+    def __init__(self, index_path: str, embeddings: Embeddings, load_fn: Optional[Callable[[str, Embeddings], "FAISS"]] = None):
+        self.index_path = index_path
+        self.embeddings = embeddings
+        self.load_fn = load_fn or _load_vector_store
+        self._store: Optional["FAISS"] = None
+        self._generation: Optional[str] = None
+        self._reload_lock = threading.Lock()
+
+    @property
+    def generation(self) -> Optional[str]:
+        return self._generation
+
+    def get(self) -> Optional["FAISS"]:
+        """Retorna o índice atual, recarregando-o apenas se a geração em disco mudou."""
+        generation = read_index_generation(self.index_path)
+        if generation is None:
+            return None
+        if generation == self._generation and self._store is not None:
+            return self._store
+
+        # apenas uma thread recarrega; as demais continuam lendo a versão anterior
+        if not self._reload_lock.acquire(blocking=self._store is None):
+            return self._store
+        try:
+            if generation != self._generation or self._store is None:
+                try:
+                    store = self.load_fn(self.index_path, self.embeddings)
+                except Exception as e:
+                    # índice possivelmente em escrita, mantém a versão anterior
+                    print(f"Erro ao recarregar FAISS: {e}")
+                    return self._store
+                # troca atômica da referência
+                self._store, self._generation = store, generation
+            return self._store
+        finally:
+            self._reload_lock.release()